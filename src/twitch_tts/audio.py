@@ -0,0 +1,284 @@
+import array
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+log = logging.getLogger(__name__)
+
+# the mixer plays interleaved signed 16 bit samples (pygame's default format)
+SAMPLE_FORMAT = -16
+SAMPLE_TYPECODE = "h"
+SAMPLE_MAX = 32767
+
+# length of the pieces time stretching cuts the audio into
+STRETCH_WINDOW = 0.03
+# sample rate the best position of a piece is searched at
+STRETCH_SEARCH_RATE = 4000
+
+
+def normalize(samples, channels: int, peak: float = 0.9):
+    """Scale the samples so that the loudest one is at `peak` of full scale.
+
+    Changes `samples` in place and returns them.
+    """
+    loudest = max(max(samples, default=0), -min(samples, default=0))
+    if not loudest:
+        return samples
+    gain = peak * SAMPLE_MAX / loudest
+    for i, sample in enumerate(samples):
+        samples[i] = max(-SAMPLE_MAX - 1, min(SAMPLE_MAX, round(sample * gain)))
+    return samples
+
+
+def stretch(samples, channels: int, speed: float = 1.0, rate: int = 44100):
+    """Play the samples `speed` times faster without changing the pitch.
+
+    Overlap-adds windows of the audio with a shorter hop than they were
+    taken at (WSOLA). Each window is moved by up to a quarter of its length
+    to where it best continues the previous one, so the waveforms line up
+    instead of cancelling out. Returns the stretched samples.
+    """
+    frames = len(samples) // channels
+    size = max(16, int(rate * STRETCH_WINDOW)) // 2 * 2
+    hop = size // 2
+    tolerance = size // 4
+    if abs(speed - 1.0) < 0.01 or frames < size + 2 * tolerance:
+        return samples
+
+    step = max(1, rate // STRETCH_SEARCH_RATE)
+    x = list(samples)
+    mono = x[0::channels]
+    # hann windows at half overlap add up to 1
+    window = [math.sin(math.pi * i / size) ** 2 for i in range(size)]
+    out_frames = int(frames / speed)
+    out = [0.0] * ((out_frames + size) * channels)
+
+    pos = 0
+    end = 0
+    for out_pos in range(0, out_frames, hop):
+        if out_pos:
+            natural = pos + hop
+            lo = max(0, int(out_pos * speed) - tolerance)
+            hi = min(frames - size, int(out_pos * speed) + tolerance)
+            if lo > hi:
+                break
+            if natural + size > frames:
+                # nothing left to compare with at the end
+                pos = min(int(out_pos * speed), hi)
+            else:
+                pos = _best_position(mono, natural, lo, hi, size, step)
+        for c in range(channels):
+            src = slice(pos * channels + c, (pos + size) * channels + c, channels)
+            dst = slice(out_pos * channels + c, (out_pos + size) * channels + c, channels)
+            out[dst] = [o + w * v for o, w, v in zip(out[dst], window, x[src])]
+        end = out_pos + size
+
+    return array.array(SAMPLE_TYPECODE, [
+        max(-SAMPLE_MAX - 1, min(SAMPLE_MAX, round(v)))
+        for v in out[:min(end, out_frames) * channels]
+    ])
+
+
+def _best_position(mono, natural, lo, hi, size, step):
+    # the position in lo..hi most similar to the natural continuation,
+    # searched every `step` frames first and then around the best one
+    target = mono[natural:natural + size:step]
+
+    def similarity(pos):
+        return sum(a * b for a, b in zip(target, mono[pos:pos + size:step]))
+
+    best = max(range(lo, hi + 1, step), key=similarity)
+    return max(range(max(lo, best - step + 1), min(hi, best + step - 1) + 1), key=similarity)
+
+
+def playback_speed(waiting: int, age: float, min_speed=1.0, max_speed=1.0, full_waiting=0, full_age=0.0):
+    """Speed to read at with `waiting` messages, the oldest `age` seconds old.
+
+    Goes from `min_speed` without a backlog to `max_speed` at `full_waiting`
+    messages or `full_age` seconds, whichever is reached first. A limit of 0
+    is ignored.
+    """
+    backlog = 0.0
+    if full_waiting:
+        backlog = waiting / full_waiting
+    if full_age:
+        backlog = max(backlog, age / full_age)
+    return min_speed + (max_speed - min_speed) * min(1.0, backlog)
+
+
+# post-processing steps by name, `fn(samples, channels, **kwargs)` returns
+# the processed samples
+STEPS = {
+    "normalize": normalize,
+    "stretch": stretch,
+}
+
+
+def max_output_size(size: int, steps) -> int:
+    """Bytes the steps produce at most from `size` bytes of samples."""
+    for name, kwargs in steps:
+        if name == "stretch":
+            size = math.ceil(size / min(1.0, kwargs.get("speed", 1.0)))
+    return size
+
+
+def run_steps(samples, channels: int, steps):
+    for name, kwargs in steps:
+        samples = STEPS[name](samples, channels, **kwargs)
+    return samples
+
+
+def _process_shared(name: str, size: int, channels: int, steps) -> int:
+    """Run the steps on samples in shared memory, in a worker process.
+
+    The result is written back to the same block, returns its size in bytes.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    data = block.buf[:size]
+    samples = data.cast(SAMPLE_TYPECODE)
+    try:
+        result = run_steps(samples, channels, steps)
+        if result is samples:
+            return size
+        with memoryview(result) as view, view.cast("B") as out:
+            if len(out) > block.size:
+                # see max_output_size
+                raise ValueError(f"{len(out)} bytes of audio do not fit in {block.size}")
+            block.buf[:len(out)] = out
+            return len(out)
+    finally:
+        samples.release()
+        data.release()
+        block.close()
+
+
+class Playback:
+    """Tells the playback thread when the current sound has ended.
+
+    pygame's end events need the SDL video subsystem and an event pump on
+    the main thread, which are not available next to the Qt GUI. The end
+    is known from the length of the sound instead: `wait` sleeps on an
+    event until then, and `interrupt` wakes it up right away. Sounds of
+    unknown length, and the few milliseconds the mixer may lag behind, are
+    checked with `is_busy` in short intervals.
+    """
+
+    def __init__(self, is_busy, poll_interval=0.01, clock=time.monotonic):
+        self.is_busy = is_busy
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._ends_at = None
+        self._interrupted = threading.Event()
+
+    def started(self, length=None):
+        """A sound of `length` seconds (None if unknown) started playing."""
+        self._interrupted.clear()
+        self._ends_at = None if length is None else self._clock() + length
+
+    def interrupt(self):
+        self._interrupted.set()
+
+    def wait(self) -> bool:
+        """Block until the sound has ended, returns False if it was interrupted."""
+        if self._ends_at is not None:
+            if self._interrupted.wait(max(0.0, self._ends_at - self._clock())):
+                return False
+        while self.is_busy():
+            if self._interrupted.wait(self.poll_interval):
+                return False
+        return True
+
+
+class PostProcessor:
+    """Runs post-processing steps on PCM audio in the mixer's format.
+
+    `steps` is a list of (name, kwargs) of the functions in STEPS. With
+    `processes`, the steps run in a pool of worker processes, so CPU heavy
+    processing does not hold the GIL of the bot. The samples are copied
+    into shared memory once instead of being pickled both ways, and the
+    result is handed to `into` straight from there.
+    """
+
+    def __init__(self, processes=0, channels=2, rate=44100):
+        self.processes = max(0, processes)
+        self.channels = channels
+        self.rate = rate
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.processes and self._executor is None:
+                # fork would copy the bot's threads and locks into the workers
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+    def stop(self):
+        """Shut down the worker processes, audio that is processed is lost."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def process(self, pcm, steps, into=bytes):
+        """Run the steps on the samples in `pcm` (any bytes-like object).
+
+        Returns `into(buffer)` of the processed samples, like a pygame Sound.
+        The buffer is only valid during that call.
+        """
+        if not steps:
+            return into(pcm)
+        with memoryview(pcm) as view, view.cast("B") as data:
+            # whole samples only
+            data = data[:len(data) - len(data) % array.array(SAMPLE_TYPECODE).itemsize]
+            return self._process(data, steps, into)
+
+    def _process(self, data: memoryview, steps, into):
+        start = time.perf_counter()
+        try:
+            executor = self._executor
+            if executor is None:
+                samples = array.array(SAMPLE_TYPECODE)
+                samples.frombytes(data)
+                result = run_steps(samples, self.channels, steps)
+                with memoryview(result) as view, view.cast("B") as out:
+                    result = into(out)
+            else:
+                result = self._process_shared(executor, data, steps, into)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        with self._lock:
+            self.calls += 1
+            self.seconds += time.perf_counter() - start
+        return result
+
+    def _process_shared(self, executor, data: memoryview, steps, into):
+        block = shared_memory.SharedMemory(create=True, size=max(1, max_output_size(len(data), steps)))
+        try:
+            block.buf[:len(data)] = data
+            size = executor.submit(_process_shared, block.name, len(data), self.channels, steps).result()
+            with block.buf[:size] as out:
+                return into(out)
+        finally:
+            block.close()
+            block.unlink()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "processes": self.processes if self._executor else 0,
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_ms": self.seconds * 1000 / self.calls if self.calls else 0.0,
+            }
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+log = logging.getLogger(__name__)
+
+
+class BatchTranslator:
+    """Collects translations with the same key and sends them at once.
+
+    The key is whatever `batch_fn` needs besides the texts, like the target
+    language. `batch_fn(texts, key)` returns the translation of every text
+    (None if it failed). While no batch with a key is being translated, a
+    text is sent right away, so a quiet chat gets no extra latency. While
+    one is, the first thread asking for a translation with that key waits
+    up to `window` seconds or until `max_items` texts are collected, then
+    translates the whole batch. The other threads just wait for their
+    result, so no extra thread is needed.
+    """
+
+    def __init__(self, batch_fn, window=0.05, max_items=8, clock=time.monotonic):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_items = max(1, max_items)
+        self.batches = 0
+        self.items = 0
+        self._clock = clock
+        self._pending = {}
+        self._sending = Counter()
+        self._cond = threading.Condition()
+
+    def translate(self, text: str, key):
+        future = Future()
+        with self._cond:
+            batch = self._pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._pending[key] = []
+            batch.append((text, future))
+            if len(batch) >= self.max_items:
+                # full, the next text starts a new batch
+                del self._pending[key]
+                self._cond.notify_all()
+
+            if leader:
+                if self._sending[key]:
+                    deadline = self._clock() + self.window
+                    while self._pending.get(key) is batch:
+                        remaining = deadline - self._clock()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+                self._sending[key] += 1
+                self.batches += 1
+                self.items += len(batch)
+
+        if leader:
+            try:
+                self._run(batch, key)
+            finally:
+                with self._cond:
+                    self._sending[key] -= 1
+                    if not self._sending[key]:
+                        del self._sending[key]
+        return future.result()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_size": self.items / self.batches if self.batches else 0.0,
+            }
+
+    def _run(self, batch, key):
+        log.debug(f"translating batch of {len(batch)} ({key})")
+        try:
+            results = self.batch_fn([text for text, _future in batch], key)
+        except Exception as e:
+            for _text, future in batch:
+                future.set_exception(e)
+            return
+        for (_text, future), result in zip(batch, results):
+            future.set_result(result)
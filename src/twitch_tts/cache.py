@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after insert.
+
+    Keys must be tuples of json serializable values if the cache is
+    persisted with `save`/`load`.
+    """
+
+    def __init__(self, maxsize=1000, ttl=3600, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def configure(self, maxsize, ttl):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._evict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, self._clock() + self.ttl)
+            self._data.move_to_end(key)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _evict(self):
+        while len(self._data) > max(self.maxsize, 0):
+            self._data.popitem(last=False)
+
+    def save(self, path: str):
+        """Write all entries that are not expired yet to `path`."""
+        now = self._clock()
+        with self._lock:
+            entries = [
+                [list(key), value, expires_at]
+                for key, (value, expires_at) in self._data.items()
+                if expires_at > now
+            ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entries, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Add the entries stored in `path`, skipping expired ones."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, encoding="utf-8") as file:
+                entries = json.load(file)
+        except Exception as e:
+            log.debug(f"unable to load cache file {path}: {e}")
+            return
+        now = self._clock()
+        with self._lock:
+            for key, value, expires_at in entries:
+                if expires_at > now:
+                    self._data[tuple(key)] = (value, expires_at)
+            self._evict()
+
+
+class AudioCache:
+    """Thread-safe LRU cache of synthesized audio, bounded by total bytes.
+
+    Entries are content addressed: `make_key` hashes everything that
+    influences the audio. If `directory` is set, entries are also written
+    there and loaded again by `load`, so they survive restarts. Files are
+    written and removed under the lock, so an eviction never races a write
+    of the same entry.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, directory=""):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def configure(self, max_bytes, directory):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.directory = directory
+            for old_key in self._evict():
+                self._remove_file(old_key)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return hashlib.sha256("\x00".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            audio = self._data.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return audio
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return
+            self._data[key] = audio
+            self.size += len(audio)
+            for old_key in self._evict():
+                self._remove_file(old_key)
+            self._write_file(key, audio)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def load(self):
+        """Load the entries stored in `directory`, most recently used last."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".mp3") and os.path.isfile(path):
+                files.append((os.path.getmtime(path), name[:-4], path))
+        for _mtime, key, path in sorted(files):
+            try:
+                with open(path, "rb") as file:
+                    audio = file.read()
+            except Exception as e:
+                log.debug(f"unable to load cached audio {path}: {e}")
+                continue
+            with self._lock:
+                if key not in self._data:
+                    self._data[key] = audio
+                    self.size += len(audio)
+                for old_key in self._evict():
+                    self._remove_file(old_key)
+
+    def _evict(self):
+        evicted = []
+        while self.size > self.max_bytes and self._data:
+            key, audio = self._data.popitem(last=False)
+            self.size -= len(audio)
+            evicted.append(key)
+        return evicted
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _write_file(self, key: str, audio: bytes):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # a crash mid-write must not leave a truncated entry for `load`
+            path = self._path(key)
+            with open(path + ".tmp", "wb") as file:
+                file.write(audio)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            log.debug(f"unable to store cached audio: {e}")
+
+    def _remove_file(self, key: str):
+        if not self.directory:
+            return
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.debug(f"unable to remove cached audio: {e}")
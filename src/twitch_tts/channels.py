@@ -0,0 +1,64 @@
+from twitch_tts.filters import AdmissionFilter, TextFilter
+
+
+class Channel:
+    """A chat channel the bot reads.
+
+    Has its own config (the top level config with the channel's overrides),
+    filters and !tts start/stop state. Translators, caches and the TTS
+    workers are shared by all channels.
+    """
+
+    def __init__(self, conf):
+        self.name = conf.Twitch_Channel
+        self.stopped = False
+        self.configure(conf)
+
+    def configure(self, conf):
+        self.conf = conf
+        self.text_filter = TextFilter.from_conf(conf)
+        self.admission = AdmissionFilter.from_conf(conf)
+        # users that got a random language assigned (AssignRandomLangToUser)
+        self.user_to_language_map = {}
+
+
+class ChannelRegistry:
+    """The channels of the bot by name, in the order they were configured."""
+
+    def __init__(self):
+        self._channels = {}
+
+    def __iter__(self):
+        return iter(list(self._channels.values()))
+
+    def __len__(self):
+        return len(self._channels)
+
+    def update(self, confs):
+        """Configure the channels of `confs`, and forget all others.
+
+        Channels that were configured before keep their !tts state.
+        """
+        channels = {}
+        for conf in confs:
+            channel = self._channels.get(conf.Twitch_Channel)
+            if channel is None:
+                channel = Channel(conf)
+            else:
+                channel.configure(conf)
+            channels[channel.name] = channel
+        self._channels = channels
+
+    def get(self, name: str):
+        return self._channels.get(name.lower().lstrip("#"))
+
+    @property
+    def default(self):
+        """The first configured channel (Twitch_Channel)."""
+        return next(iter(self._channels.values()), None)
+
+    def names(self):
+        return list(self._channels)
+
+    def stats(self):
+        return {name: channel.admission.stats() for name, channel in self._channels.items()}
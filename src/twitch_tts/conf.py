@@ -10,9 +10,13 @@ class Conf:
     Trans_Username: any
     Twitch_Channel: any
     Trans_OAUTH: any
+    Channels: list
 
     YoutubeChannelUrl: any
     YoutubeApiKey: any
+    Youtube_Live_Check_Min: float
+    Youtube_Live_Check_Max: float
+    Youtube_Channel_Cache_File: str
 
     Ignore_Lang: list[str]
     Ignore_Users: list[str]
@@ -24,10 +28,27 @@ class Conf:
     Ignore_Mentions: bool
     Mentions_Allow_Channel: bool
     Delete_Mention_Names: bool
+    Third_Party_Emotes_File: str
     AssignRandomLangToUser: any
     url_suffix: any
+    GoogleTranslate_PoolSize: int
+    GoogleTranslate_Retries: int
+    GoogleTranslate_Backoff: float
+    GoogleTranslate_Breaker_Failures: int
+    GoogleTranslate_Breaker_Reset: float
+    GoogleTranslate_Breaker_Max_Reset: float
+    GoogleTranslate_Rate: float
+    GoogleTranslate_Burst: int
+    GoogleTranslate_Batch_Window: float
+    GoogleTranslate_Batch_Max: int
     Debug: any
     Translator: any
+    Translator_Fallback: list[str]
+    Translator_Timeouts: dict
+    Translator_Hedge_After: float
+    DeepL_Auth_Key: str
+    DeepL_Api_Url: str
+    DeepL_Batch_Window: float
     UserToLangMap: any
     lang_SkipDetect: any
     lang_Default: any
@@ -38,10 +59,38 @@ class Conf:
     lang_HomeToOther: any
     TTS_IN: any
     TTS_OUT: any
+    TTS_Synth_Workers: int
+    TTS_Prefetch: int
+    TTS_Debug_Files: bool
+    TTS_Normalize: float
+    TTS_Process_Workers: int
+    TTS_Speed_Min: float
+    TTS_Speed_Max: float
+    TTS_Speed_Backlog: int
+    TTS_Speed_Backlog_Age: float
+    TTS_Queue_Max: int
+    TTS_Queue_Policy: str
+    TTS_Queue_Per_User: int
+    TTS_Queue_Max_Age: float
+    TTS_Queue_Merge: bool
+    TTS_Cache_MB: float
+    TTS_Cache_Dir: str
     Send_Translation_To_Chat: bool
     ReadOnlyTheseLang: any
     TargetLangs: list[str]
     deepl_lang_dict: object
+    Translate_Workers: int
+    Translate_Max_Pending: int
+    Translation_Cache_Size: int
+    Translation_Cache_TTL: float
+    Translation_Cache_File: str
+    Detectors: list[str]
+    Detect_MinConfidence: float
+    Detect_Cache_Size: int
+    Detect_Cache_TTL: float
+    Detect_UserMemo_After: int
+    Detect_UserMemo_Reverify: int
+    Detect_UserMemo_TTL: float
 
 
 def load_config():
@@ -53,6 +102,34 @@ def load_config():
         print("Please make [config.jsonc] and put it next to run")
         input()  # stop for error!!
 
+    return parse_config(config)
+
+
+def channel_confs(conf: Conf) -> list:
+    """Config of every channel to join, Twitch_Channel first."""
+    return [conf] + conf.Channels
+
+
+def _parse_channels(config) -> list:
+    """Configs of the additional channels listed in Channels.
+
+    An entry is a channel name or an object with Twitch_Channel and the
+    settings that differ from the top level config.
+    """
+    confs = []
+    names = {config['Twitch_Channel'].strip().lower().lstrip("#")}
+    for entry in config.get('Channels', []):
+        if isinstance(entry, str):
+            entry = {'Twitch_Channel': entry}
+        channel_conf = parse_config({**config, **entry, 'Channels': []})
+        if not channel_conf.Twitch_Channel or channel_conf.Twitch_Channel in names:
+            continue
+        names.add(channel_conf.Twitch_Channel)
+        confs.append(channel_conf)
+    return confs
+
+
+def parse_config(config) -> Conf:
     ###################################
     # fix some config errors ##########
     # lowercase channel and username ------
@@ -92,12 +169,22 @@ def load_config():
     else:
         _url_suffix = config['GoogleTranslate_suffix']
 
+    _TTS_Queue_Policy = config.get('TTS_Queue_Policy', 'drop_oldest')
+    if _TTS_Queue_Policy not in ('drop_oldest', 'drop_newest'):
+        _TTS_Queue_Policy = 'drop_oldest'
+
+    _TTS_Speed_Min = min(3.0, max(0.5, float(config.get('TTS_Speed_Min', 1.0))))
+
     return Conf(
         Trans_Username=_Trans_Username,
         Twitch_Channel=_Twitch_Channel,
         Trans_OAUTH=_Trans_OAUTH,
+        Channels=_parse_channels(config),
         YoutubeChannelUrl = config['YoutubeChannelUrl'],
         YoutubeApiKey = config['YoutubeApiKey'],
+        Youtube_Live_Check_Min=max(5.0, float(config.get('Youtube_Live_Check_Min', 30))),
+        Youtube_Live_Check_Max=max(5.0, float(config.get('Youtube_Live_Check_Max', 300))),
+        Youtube_Channel_Cache_File=config.get('Youtube_Channel_Cache_File', 'youtube_channels.json'),
         Ignore_Lang=_Ignore_Lang,
         Ignore_Users=_Ignore_Users,
         Ignore_Line=_Ignore_Line,
@@ -108,10 +195,27 @@ def load_config():
         Ignore_Mentions=_Ignore_Mentions,
         Mentions_Allow_Channel=_Mentions_Allow_Channel,
         Delete_Mention_Names=_Delete_Mention_Names,
+        Third_Party_Emotes_File=config.get('Third_Party_Emotes_File', ''),
         AssignRandomLangToUser=_AssignRandomLangToUser,
         url_suffix=_url_suffix,
+        GoogleTranslate_PoolSize=max(1, int(config.get('GoogleTranslate_PoolSize', 10))),
+        GoogleTranslate_Retries=max(0, int(config.get('GoogleTranslate_Retries', 2))),
+        GoogleTranslate_Backoff=max(0.0, float(config.get('GoogleTranslate_Backoff', 0.3))),
+        GoogleTranslate_Breaker_Failures=max(1, int(config.get('GoogleTranslate_Breaker_Failures', 5))),
+        GoogleTranslate_Breaker_Reset=max(0.0, float(config.get('GoogleTranslate_Breaker_Reset', 10))),
+        GoogleTranslate_Breaker_Max_Reset=max(0.0, float(config.get('GoogleTranslate_Breaker_Max_Reset', 300))),
+        GoogleTranslate_Rate=max(0.0, float(config.get('GoogleTranslate_Rate', 5))),
+        GoogleTranslate_Burst=max(1, int(config.get('GoogleTranslate_Burst', 10))),
+        GoogleTranslate_Batch_Window=max(0.0, float(config.get('GoogleTranslate_Batch_Window', 0.05))),
+        GoogleTranslate_Batch_Max=max(1, int(config.get('GoogleTranslate_Batch_Max', 8))),
         Debug=config['Debug'],
         Translator=config['Translator'],
+        Translator_Fallback=[x.strip().lower() for x in config.get('Translator_Fallback', ['google'])],
+        Translator_Timeouts={k.lower(): max(0.1, float(v)) for k, v in config.get('Translator_Timeouts', {}).items()},
+        Translator_Hedge_After=max(0.0, float(config.get('Translator_Hedge_After', 0))),
+        DeepL_Auth_Key=config.get('DeepL_Auth_Key', '').strip(),
+        DeepL_Api_Url=config.get('DeepL_Api_Url', '').strip(),
+        DeepL_Batch_Window=max(0.0, float(config.get('DeepL_Batch_Window', 0.05))),
         UserToLangMap={k.lower(): v for k, v in config['UserToLangMap'].items()},
         lang_SkipDetect=config['lang_SkipDetect'],
         lang_Default=config['lang_Default'],
@@ -122,8 +226,36 @@ def load_config():
         lang_HomeToOther=config['lang_HomeToOther'],
         TTS_IN=config['TTS_IN'],
         TTS_OUT=config['TTS_OUT'],
+        TTS_Synth_Workers=max(1, int(config.get('TTS_Synth_Workers', 2))),
+        TTS_Prefetch=max(1, int(config.get('TTS_Prefetch', 2))),
+        TTS_Debug_Files=config.get('TTS_Debug_Files', False),
+        TTS_Normalize=min(1.0, max(0.0, float(config.get('TTS_Normalize', 0)))),
+        TTS_Process_Workers=max(0, int(config.get('TTS_Process_Workers', 0))),
+        TTS_Speed_Min=_TTS_Speed_Min,
+        TTS_Speed_Max=max(_TTS_Speed_Min, min(3.0, float(config.get('TTS_Speed_Max', 1.0)))),
+        TTS_Speed_Backlog=max(0, int(config.get('TTS_Speed_Backlog', 10))),
+        TTS_Speed_Backlog_Age=max(0.0, float(config.get('TTS_Speed_Backlog_Age', 30))),
+        TTS_Queue_Max=max(0, int(config.get('TTS_Queue_Max', 50))),
+        TTS_Queue_Policy=_TTS_Queue_Policy,
+        TTS_Queue_Per_User=max(0, int(config.get('TTS_Queue_Per_User', 0))),
+        TTS_Queue_Max_Age=max(0.0, float(config.get('TTS_Queue_Max_Age', 0))),
+        TTS_Queue_Merge=config.get('TTS_Queue_Merge', False),
+        TTS_Cache_MB=max(0.0, float(config.get('TTS_Cache_MB', 16))),
+        TTS_Cache_Dir=config.get('TTS_Cache_Dir', ''),
         Send_Translation_To_Chat=config.get('Send_Translation_To_Chat', False),
         ReadOnlyTheseLang=config['ReadOnlyTheseLang'],
         TargetLangs=[key for key in constants.LANGUAGES.keys()],
         deepl_lang_dict=constants.DEEPL_LANG_DICT,
+        Translate_Workers=max(1, int(config.get('Translate_Workers', 4))),
+        Translate_Max_Pending=max(1, int(config.get('Translate_Max_Pending', 50))),
+        Translation_Cache_Size=max(0, int(config.get('Translation_Cache_Size', 2000))),
+        Translation_Cache_TTL=float(config.get('Translation_Cache_TTL', 86400)),
+        Translation_Cache_File=config.get('Translation_Cache_File', ''),
+        Detectors=[x.strip().lower() for x in config.get('Detectors', ['offline', 'google'])],
+        Detect_MinConfidence=float(config.get('Detect_MinConfidence', 0.8)),
+        Detect_Cache_Size=max(0, int(config.get('Detect_Cache_Size', 5000))),
+        Detect_Cache_TTL=float(config.get('Detect_Cache_TTL', 86400)),
+        Detect_UserMemo_After=max(0, int(config.get('Detect_UserMemo_After', 0))),
+        Detect_UserMemo_Reverify=max(0, int(config.get('Detect_UserMemo_Reverify', 10))),
+        Detect_UserMemo_TTL=float(config.get('Detect_UserMemo_TTL', 1800)),
     )
@@ -0,0 +1,153 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+log = logging.getLogger(__name__)
+
+FREE_API_URL = "https://api-free.deepl.com"
+PRO_API_URL = "https://api.deepl.com"
+
+# texts per /v2/translate request at most
+MAX_TEXTS = 50
+
+
+class deepl_error(Exception):
+    def __init__(self, msg, status=None):
+        self.status = status
+        super().__init__(msg)
+
+
+class deepl_quota_exceeded(deepl_error):
+    pass
+
+
+def default_api_url(auth_key: str) -> str:
+    # keys of the free plan end with ":fx"
+    return FREE_API_URL if auth_key.endswith(":fx") else PRO_API_URL
+
+
+class DeepLClient:
+    """Client for the official DeepL API.
+
+    Uses one pooled keep-alive session for all requests and sends up to
+    `MAX_TEXTS` texts per request. Characters sent are counted locally,
+    `usage` asks the API for the quota of the account. `api_url` can point
+    to a local stub server for testing.
+
+    The calls block. They never run on the bot's event loop: the
+    translation chain runs every engine on its own executor, with a
+    timeout, and the session is shared by those threads.
+    """
+
+    def __init__(
+        self,
+        auth_key: str,
+        api_url="",
+        timeout=5,
+        pool_size=10,
+        retries=2,
+        backoff_factor=0.3,
+    ):
+        self.auth_key = auth_key
+        self.api_url = (api_url or default_api_url(auth_key)).rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.requests = 0
+        self.characters = 0
+        self.character_count = None
+        self.character_limit = None
+        self._lock = threading.Lock()
+        self.session = self._create_session()
+
+    def _create_session(self):
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            # the request was sent already, a read timeout is not retried
+            read=0,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            # 429: too many requests, Retry-After is respected
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Authorization"] = f"DeepL-Auth-Key {self.auth_key}"
+        return session
+
+    def is_compatible(self, auth_key, api_url):
+        """Whether this client can be reused for the given settings."""
+        return (
+            self.auth_key == auth_key
+            and self.api_url == (api_url or default_api_url(auth_key)).rstrip("/")
+        )
+
+    def close(self):
+        self.session.close()
+
+    def translate(self, text: str, target_lang: str, source_lang=None) -> str:
+        return self.translate_batch([text], target_lang, source_lang)[0]
+
+    def translate_batch(self, texts, target_lang: str, source_lang=None):
+        """Translate several texts, `MAX_TEXTS` per request."""
+        texts = [str(text) for text in texts]
+        results = []
+        for start in range(0, len(texts), MAX_TEXTS):
+            chunk = texts[start : start + MAX_TEXTS]
+            body = {"text": chunk, "target_lang": target_lang}
+            if source_lang:
+                body["source_lang"] = source_lang
+            data = self._request("POST", "/v2/translate", json=body)
+            translations = data.get("translations", [])
+            if len(translations) != len(chunk):
+                raise deepl_error(f"expected {len(chunk)} translations, got {len(translations)}")
+            results.extend(t["text"] for t in translations)
+            with self._lock:
+                self.characters += sum(len(text) for text in chunk)
+        return results
+
+    def usage(self):
+        """Fetch the character count and limit of the account."""
+        data = self._request("GET", "/v2/usage")
+        with self._lock:
+            self.character_count = data.get("character_count")
+            self.character_limit = data.get("character_limit")
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "characters": self.characters,
+                "character_count": self.character_count,
+                "character_limit": self.character_limit,
+            }
+
+    def _request(self, method: str, path: str, **kwargs):
+        try:
+            r = self.session.request(
+                method, self.api_url + path, timeout=self.timeout, **kwargs
+            )
+        except requests.exceptions.RequestException as e:
+            log.debug(str(e))
+            raise deepl_error(f"request to DeepL failed: {e}")
+        with self._lock:
+            self.requests += 1
+        if r.status_code == 456:
+            raise deepl_quota_exceeded("DeepL quota exceeded", status=r.status_code)
+        if r.status_code != 200:
+            raise deepl_error(f"{r.status_code} ({r.reason}) from DeepL API", status=r.status_code)
+        return r.json()
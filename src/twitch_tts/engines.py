@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 5.0
+
+
+class TranslationEngine:
+    """A translation backend that can be part of a `TranslationChain`.
+
+    `translate_fn(text, lang_src, lang_dest)` returns the translation and
+    raises on failure. `supports_fn(lang_src, lang_dest)` tells whether the
+    engine can translate between the languages at all.
+    """
+
+    def __init__(self, name: str, translate_fn, supports_fn=None, timeout=DEFAULT_TIMEOUT):
+        self.name = name
+        self.translate_fn = translate_fn
+        self.supports_fn = supports_fn
+        self.timeout = timeout
+
+    def supports(self, lang_src: str, lang_dest: str) -> bool:
+        return self.supports_fn is None or self.supports_fn(lang_src, lang_dest)
+
+    def translate(self, text: str, lang_src: str, lang_dest: str) -> str:
+        return self.translate_fn(text, lang_src, lang_dest)
+
+
+class EngineRegistry:
+    """Translation engines by name."""
+
+    def __init__(self):
+        self._engines = {}
+
+    def register(self, engine: TranslationEngine):
+        self._engines[engine.name] = engine
+        return engine
+
+    def get(self, name: str):
+        return self._engines.get(name)
+
+    def names(self):
+        return list(self._engines)
+
+    def chain(self, names, hedge_after=0.0, workers=8):
+        """Build a chain of the registered engines in the given order.
+
+        Unknown and duplicate names are skipped.
+        """
+        engines = []
+        for name in names:
+            engine = self._engines.get(name)
+            if engine is None:
+                log.warning(f"unknown translation engine: {name}")
+            elif engine not in engines:
+                engines.append(engine)
+        return TranslationChain(engines, hedge_after=hedge_after, workers=workers)
+
+
+class TranslationChain:
+    """Tries translation engines in order until one answers.
+
+    An engine that fails, answers with an empty text or does not answer
+    within its timeout is skipped in favour of the next one. With
+    `hedge_after` > 0, the next engine is also asked if the current one did
+    not answer within `hedge_after` seconds, and the first answer wins.
+    Engines run on a dedicated pool, so a slow engine never blocks the
+    caller longer than its timeout.
+    """
+
+    def __init__(self, engines, hedge_after=0.0, workers=8, clock=time.monotonic):
+        self.engines = list(engines)
+        self.hedge_after = hedge_after
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="engine")
+        self._stats = {
+            e.name: {"calls": 0, "wins": 0, "failures": 0, "timeouts": 0, "seconds": 0.0}
+            for e in self.engines
+        }
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def translate(self, text: str, lang_src: str, lang_dest: str):
+        """Return (translation, engine name), or ("", None) if all engines failed."""
+        candidates = [e for e in self.engines if e.supports(lang_src, lang_dest)]
+        pending = {}
+        hedge_at = None
+        next_index = 0
+
+        def launch():
+            nonlocal next_index, hedge_at
+            engine = candidates[next_index]
+            next_index += 1
+            started = self._clock()
+            future = self._executor.submit(engine.translate, text, lang_src, lang_dest)
+            pending[future] = (engine, started)
+            hedge_at = started + self.hedge_after if self.hedge_after > 0 else None
+            self._count(engine, "calls")
+
+        if not candidates:
+            return "", None
+        launch()
+        while pending:
+            now = self._clock()
+            until = min(started + engine.timeout for engine, started in pending.values())
+            if hedge_at is not None and next_index < len(candidates):
+                until = min(until, hedge_at)
+            done, _not_done = wait(pending, timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                engine, started = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    log.debug(f"[{engine.name}] translation failed: {e}")
+                    result = None
+                if result:
+                    self._count(engine, "wins", self._clock() - started)
+                    return result, engine.name
+                self._count(engine, "failures")
+
+            now = self._clock()
+            for future, (engine, started) in list(pending.items()):
+                if now >= started + engine.timeout:
+                    # the request keeps running on the pool, its result is ignored
+                    del pending[future]
+                    log.debug(f"[{engine.name}] translation timed out")
+                    self._count(engine, "timeouts")
+
+            if next_index < len(candidates):
+                if not pending or (hedge_at is not None and now >= hedge_at):
+                    launch()
+        return "", None
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "calls": s["calls"],
+                    "wins": s["wins"],
+                    "failures": s["failures"],
+                    "timeouts": s["timeouts"],
+                    "avg_ms": s["seconds"] * 1000 / s["wins"] if s["wins"] else 0.0,
+                }
+                for name, s in self._stats.items()
+            }
+
+    def _count(self, engine: TranslationEngine, key: str, seconds=0.0):
+        with self._lock:
+            stats = self._stats[engine.name]
+            stats[key] += 1
+            stats["seconds"] += seconds
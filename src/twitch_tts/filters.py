@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import re
+from collections import Counter
+
+log = logging.getLogger(__name__)
+
+LINK_PATTERN = r"https?://\S+"
+MENTION_PATTERN = r"@\w+"
+
+# most emoji characters
+EMOJI_PATTERN = (
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "\U00002702-\U000027B0"  # dingbats
+    "\U000024C2-\U0001F251"  # enclosed characters
+    "\U0001F900-\U0001F9FF"  # supplemental symbols
+    "\U0001FA00-\U0001FA6F"  # chess symbols
+    "\U0001FA70-\U0001FAFF"  # symbols and pictographs extended-a
+    "\U00002600-\U000026FF"  # misc symbols
+    "\U0001F700-\U0001F77F"  # alchemical symbols
+    "]+"
+)
+
+
+class AdmissionFilter:
+    """Cheap checks deciding whether a message is processed at all.
+
+    Runs before any text is rewritten. Every check is a prefix test, a flag
+    or a set lookup, and rejected messages are counted by reason.
+    """
+
+    def __init__(self, ignore_users=(), command_prefix="!"):
+        self.ignore_users = frozenset(u.lower() for u in ignore_users)
+        self.command_prefix = command_prefix
+        self.rejected = Counter()
+
+    @classmethod
+    def from_conf(cls, conf):
+        return cls(ignore_users=conf.Ignore_Users)
+
+    def check(self, user: str, text: str, echo=False):
+        """Return why the message should be ignored, or None."""
+        if text.startswith(self.command_prefix):
+            return self.count("command")
+        if echo:
+            return self.count("echo")
+        if user in self.ignore_users:
+            return self.count("ignored_user")
+        return None
+
+    def count(self, reason: str):
+        self.rejected[reason] += 1
+        return reason
+
+    def stats(self):
+        return dict(self.rejected)
+
+
+def strip_emote_ranges(text: str, emotes: str) -> str:
+    """Cut the emotes of a Twitch `emotes` tag out of `text` in one pass.
+
+    The tag looks like `25:0-4,12-16/1902:6-10`, positions are inclusive
+    character indices into the message as it was received.
+    """
+    if not emotes:
+        return text
+    ranges = []
+    for emote in emotes.split("/"):
+        _emote_id, _sep, positions = emote.partition(":")
+        for pos in positions.split(","):
+            start, _sep, end = pos.partition("-")
+            try:
+                ranges.append((int(start), int(end) + 1))
+            except ValueError:
+                continue
+    ranges.sort()
+
+    parts = []
+    last = 0
+    for start, end in ranges:
+        if start > last:
+            parts.append(text[last:start])
+        last = max(last, end)
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def load_emote_names(path: str) -> frozenset:
+    """Emote names from a json file, see Third_Party_Emotes_File."""
+    if not path or not os.path.exists(path):
+        return frozenset()
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except Exception as e:
+        log.debug(f"unable to load emotes from {path}: {e}")
+        return frozenset()
+
+    names = set()
+    for entry in data:
+        if isinstance(entry, dict):
+            entry = entry.get("code") or entry.get("name")
+        if isinstance(entry, str) and entry:
+            names.add(entry)
+    return frozenset(names)
+
+
+def _alternation(words) -> str:
+    # longest first, so a word is never shadowed by one of its prefixes
+    words = sorted({w for w in words if w}, key=len, reverse=True)
+    return "|".join(re.escape(w) for w in words)
+
+
+class TextFilter:
+    """The message filter rules of the config, compiled into two regexes.
+
+    `reject` finds Ignore_Line words and @mentions in a single scan,
+    `clean` removes Delete_Words, links, emojis and @mention names in a
+    single substitution, then drops third-party emote tokens while
+    collapsing whitespace.
+    """
+
+    def __init__(
+        self,
+        ignore_line=(),
+        delete_words=(),
+        ignore_mentions=False,
+        allowed_mention="",
+        delete_mention_names=False,
+        ignore_links=False,
+        link_replacement="",
+        ignore_emojis=False,
+        emotes=frozenset(),
+    ):
+        self.allowed_mention = allowed_mention.lower() if allowed_mention else ""
+        self.link_replacement = link_replacement or ""
+        self.emotes = frozenset(emotes)
+
+        reject = []
+        ignore = _alternation(ignore_line)
+        if ignore:
+            reject.append(f"(?P<line>{ignore})")
+        if ignore_mentions:
+            # only the @ is consumed, so Ignore_Line words inside the name are found too
+            reject.append(r"@(?=(?P<mention>\w+))")
+        self._reject = re.compile("|".join(reject)) if reject else None
+
+        delete = []
+        if ignore_links:
+            delete.append(f"(?P<link>{LINK_PATTERN})")
+        words = _alternation(delete_words)
+        if words:
+            delete.append(words)
+        if ignore_emojis:
+            delete.append(EMOJI_PATTERN)
+        if delete_mention_names:
+            delete.append(MENTION_PATTERN)
+        self._delete = re.compile("|".join(delete)) if delete else None
+
+    @classmethod
+    def from_conf(cls, conf):
+        return cls(
+            ignore_line=conf.Ignore_Line,
+            delete_words=conf.Delete_Words,
+            ignore_mentions=conf.Ignore_Mentions,
+            allowed_mention=conf.Twitch_Channel if conf.Mentions_Allow_Channel else "",
+            delete_mention_names=conf.Delete_Mention_Names,
+            ignore_links=conf.Ignore_Links,
+            link_replacement=conf.Delete_Links,
+            ignore_emojis=conf.Ignore_Emojis,
+            emotes=load_emote_names(conf.Third_Party_Emotes_File),
+        )
+
+    def reject(self, text: str):
+        """Return why the message should be ignored, or None."""
+        if self._reject is None:
+            return None
+        for m in self._reject.finditer(text):
+            if m.lastgroup == "line":
+                log.debug(f"{m.group()} is in _Ignore_Line")
+                return "ignore_line"
+            if m.group("mention").lower() != self.allowed_mention:
+                log.debug(f"message contains mentions, skipping")
+                return "mention"
+        return None
+
+    def clean(self, text: str) -> str:
+        if self._delete is not None:
+            if self.link_replacement:
+                text = self._delete.sub(self._replace, text)
+            else:
+                text = self._delete.sub("", text)
+        if self.emotes:
+            return " ".join(t for t in text.split() if t not in self.emotes)
+        return " ".join(text.split())
+
+    def _replace(self, m) -> str:
+        return self.link_replacement if m.lastgroup == "link" else ""
@@ -2,7 +2,9 @@
 # author LuShan
 # version : 1.1.9
 import json, requests, random
+from requests.adapters import HTTPAdapter
 from urllib.parse import quote
+from urllib3.util.retry import Retry
 import urllib3
 import logging
 from .constants import LANGUAGES
@@ -13,6 +15,8 @@ log.addHandler(logging.NullHandler())
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 _MAGIC_SEQUENCE = "MkEWBc"
+# longest text the web api translates or detects
+MAX_TEXT_LENGTH = 5000
 
 
 def sanitize_lang(lang: str) -> str:
@@ -93,9 +97,33 @@ class google_translator:
     :param proxies: proxies Will be used for every request.
     :type proxies: class : dict; like: {'http': 'http:171.112.169.47:19934/', 'https': 'https:171.112.169.47:19934/'}
 
+    :param pool_size: Number of keep-alive connections kept open to the translate host.
+                      Requests from several threads share the pool.
+    :type pool_size: int
+
+    :param retries: How often a failed connect or a 5xx response is retried.
+    :type retries: int
+
+    :param backoff_factor: Retries wait backoff_factor * 2 ** (retry - 1) seconds.
+    :type backoff_factor: float
+
     """
 
-    def __init__(self, url_suffix, timeout=5, proxies=None):
+    def __init__(
+        self,
+        url_suffix,
+        timeout=5,
+        proxies=None,
+        pool_size=10,
+        retries=2,
+        backoff_factor=0.3,
+    ):
+        self.url_suffix = url_suffix
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        if proxies == None or type(proxies) != dict:
+            proxies = {}
         self.proxies = proxies
         url_base = "https://translate.google.{}".format(url_suffix)
         self.url = url_base + "/_/TranslateWebserverUi/data/batchexecute"
@@ -107,12 +135,63 @@ class google_translator:
             "Content-Type": "application/x-www-form-urlencoded;charset=utf-8",
         }
         self.timeout = timeout
+        self.session = self._create_session()
+
+    def _create_session(self):
+        # one long-lived session, so connections (and their TLS handshakes)
+        # are reused across messages. urllib3 pools are thread-safe.
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            # the request was sent already, a read timeout is not retried
+            read=0,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.proxies = self.proxies
+        session.verify = False
+        return session
+
+    def is_compatible(self, url_suffix, pool_size, retries, backoff_factor):
+        """Whether this translator can be reused for the given settings."""
+        return (
+            self.url_suffix == url_suffix
+            and self.pool_size == pool_size
+            and self.retries == retries
+            and self.backoff_factor == backoff_factor
+        )
+
+    def close(self):
+        self.session.close()
 
     def _package_rpc(self, text, lang_src="auto", lang_tgt="auto"):
+        return self._package_rpcs([(text, lang_src, lang_tgt)])
+
+    def _package_rpcs(self, items):
+        """Package several (text, lang_src, lang_tgt) rpcs into one request.
+
+        A single rpc gets the id "generic", batched rpcs are numbered from
+        "1", the response carries the id as last element of every result.
+        """
         GOOGLE_TTS_RPC = [_MAGIC_SEQUENCE]
-        parameter = [[text.strip(), lang_src, lang_tgt, True], [1]]
-        escaped_parameter = json.dumps(parameter, separators=(",", ":"))
-        rpc = [[[random.choice(GOOGLE_TTS_RPC), escaped_parameter, None, "generic"]]]
+        rpcs = []
+        for i, (text, lang_src, lang_tgt) in enumerate(items):
+            parameter = [[text.strip(), lang_src, lang_tgt, True], [1]]
+            escaped_parameter = json.dumps(parameter, separators=(",", ":"))
+            rpc_id = "generic" if len(items) == 1 else str(i + 1)
+            rpcs.append([random.choice(GOOGLE_TTS_RPC), escaped_parameter, None, rpc_id])
+        rpc = [rpcs]
         espaced_rpc = json.dumps(rpc, separators=(",", ":"))
         # text_urldecode = quote(text.strip())
         freq_initial = "f.req={}&".format(quote(espaced_rpc))
@@ -122,117 +201,156 @@ class google_translator:
     def _post_request(self, url, data):
         return requests.Request(method="POST", url=url, data=data, headers=self.headers)
 
-    def translate(self, text, lang_tgt="auto", lang_src="auto", pronounce=False):
-        lang_src = sanitize_lang(lang_src)
-        lang_tgt = sanitize_lang(lang_tgt)
-        text = str(text)
-        if len(text) >= 5000:
-            return "Warning: Can only detect less than 5000 characters"
-        if len(text) == 0:
-            return ""
-        freq = self._package_rpc(text, lang_src, lang_tgt)
+    def _send_rpc(self, freq):
+        """Send a packaged rpc and return the decoded MkEWBc payload."""
+        payloads = self._send_rpcs(freq)
+        response_ = next(iter(payloads.values()), None)
+        if response_ is None:
+            raise google_translate_error("No translation in response")
+        return response_
+
+    def _send_rpcs(self, freq):
+        """Send packaged rpcs and return the decoded MkEWBc payloads by rpc id.
+
+        Rpcs that failed on the server side have a payload of None.
+        """
         req = self._post_request(self.url, freq)
         try:
-            if self.proxies == None or type(self.proxies) != dict:
-                self.proxies = {}
-            with requests.Session() as s:
-                s.proxies = self.proxies
-                r = s.send(
-                    request=req.prepare(), verify=False, timeout=self.timeout
-                )
+            r = self.session.send(
+                request=self.session.prepare_request(req), timeout=self.timeout
+            )
+            payloads = {}
             for line in r.iter_lines(chunk_size=1024):
                 decoded_line = line.decode("utf-8")
                 if _MAGIC_SEQUENCE not in decoded_line:
                     continue
 
-                try:
-                    response = decoded_line
-                    response = json.loads(response)
-                    response = list(response)
-                    response = json.loads(response[0][2])
-                    response_ = list(response)
-                    response = response_[1][0]
-                    if len(response) == 1:
-                        if len(response[0]) > 5:
-                            sentences = response[0][5]
-                        else:  ## only url
-                            sentences = response[0][0]
-                            if pronounce == False:
-                                return sentences
-                            elif pronounce == True:
-                                return [sentences, None, None]
-                        translate_text = ""
-                        for sentence in sentences:
-                            sentence = sentence[0]
-                            translate_text += sentence.strip() + " "
-                        translate_text = translate_text
-                        if pronounce == False:
-                            return translate_text
-                        elif pronounce == True:
-                            pronounce_src = response_[0][0]
-                            pronounce_tgt = response_[1][0][0][1]
-                            return [translate_text, pronounce_src, pronounce_tgt]
-                    elif len(response) == 2:
-                        sentences = []
-                        for i in response:
-                            sentences.append(i[0])
-                        if pronounce == False:
-                            return sentences
-                        elif pronounce == True:
-                            pronounce_src = response_[0][0]
-                            pronounce_tgt = response_[1][0][0][1]
-                            return [sentences, pronounce_src, pronounce_tgt]
-                except Exception as e:
-                    raise e
+                for entry in json.loads(decoded_line):
+                    if not isinstance(entry, list) or len(entry) < 3:
+                        continue
+                    if entry[0] != "wrb.fr" or entry[1] != _MAGIC_SEQUENCE:
+                        continue
+                    payloads[entry[-1]] = list(json.loads(entry[2])) if entry[2] else None
+            if payloads:
+                return payloads
             r.raise_for_status()
+            return payloads
         except requests.exceptions.ConnectTimeout as e:
             raise e
         except requests.exceptions.HTTPError as e:
             # Request successful, bad response
+            log.debug(str(e))
             raise google_translate_error(tts=self, response=r)
         except requests.exceptions.RequestException as e:
             # Request failed
+            log.debug(str(e))
             raise google_translate_error(tts=self)
 
-    def detect(self, text):
+    def _parse_translation(self, response_, pronounce=False):
+        response = response_[1][0]
+        if len(response) == 1:
+            if len(response[0]) > 5:
+                sentences = response[0][5]
+            else:  ## only url
+                sentences = response[0][0]
+                if pronounce == False:
+                    return sentences
+                elif pronounce == True:
+                    return [sentences, None, None]
+            translate_text = ""
+            for sentence in sentences:
+                sentence = sentence[0]
+                translate_text += sentence.strip() + " "
+            translate_text = translate_text
+            if pronounce == False:
+                return translate_text
+            elif pronounce == True:
+                pronounce_src = response_[0][0]
+                pronounce_tgt = response_[1][0][0][1]
+                return [translate_text, pronounce_src, pronounce_tgt]
+        elif len(response) == 2:
+            sentences = []
+            for i in response:
+                sentences.append(i[0])
+            if pronounce == False:
+                return sentences
+            elif pronounce == True:
+                pronounce_src = response_[0][0]
+                pronounce_tgt = response_[1][0][0][1]
+                return [sentences, pronounce_src, pronounce_tgt]
+
+    def _parse_detection(self, response_):
+        detect_lang = response_[0][2]
+        return [detect_lang, LANGUAGES[detect_lang.lower()]]
+
+    def translate(self, text, lang_tgt="auto", lang_src="auto", pronounce=False):
+        lang_src = sanitize_lang(lang_src)
+        lang_tgt = sanitize_lang(lang_tgt)
         text = str(text)
-        if len(text) >= 5000:
-            return log.debug("Warning: Can only detect less than 5000 characters")
+        if len(text) >= MAX_TEXT_LENGTH:
+            return "Warning: Can only detect less than 5000 characters"
         if len(text) == 0:
             return ""
-        freq = self._package_rpc(text)
-        req = self._post_request(self.url, freq)
-        try:
-            if self.proxies == None or type(self.proxies) != dict:
-                self.proxies = {}
-            with requests.Session() as s:
-                s.proxies = self.proxies
-                r = s.send(
-                    request=req.prepare(), verify=False, timeout=self.timeout
-                )
+        response_ = self._send_rpc(self._package_rpc(text, lang_src, lang_tgt))
+        return self._parse_translation(response_, pronounce)
 
-            for line in r.iter_lines(chunk_size=1024):
-                decoded_line = line.decode("utf-8")
-                if _MAGIC_SEQUENCE not in decoded_line:
-                    continue
+    def translate_batch(self, texts, lang_tgt="auto", lang_src="auto"):
+        """
+        Translate several texts in a single request.
 
-                # regex_str = r"\[\[\"wrb.fr\",\"MkEWBc\",\"\[\[(.*).*?,\[\[\["
-                try:
-                    response = decoded_line
-                    response = json.loads(response)
-                    response = list(response)
-                    response = json.loads(response[0][2])
-                    response = list(response)
-                    detect_lang = response[0][2]
-                except Exception:
-                    raise Exception
-                return [detect_lang, LANGUAGES[detect_lang.lower()]]
-            r.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            # Request successful, bad response
-            log.debug(str(e))
-            raise google_translate_error(tts=self, response=r)
-        except requests.exceptions.RequestException as e:
-            # Request failed
-            log.debug(str(e))
-            raise google_translate_error(tts=self)
+        :return: list with the translation of every text, None for texts
+                 that could not be translated
+        """
+        lang_src = sanitize_lang(lang_src)
+        lang_tgt = sanitize_lang(lang_tgt)
+        texts = [str(text) for text in texts]
+        results = ["" if len(text) == 0 else None for text in texts]
+        # texts that are too long stay untranslated, like in `translate`
+        items = [i for i, text in enumerate(texts) if 0 < len(text) < MAX_TEXT_LENGTH]
+        if not items:
+            return results
+        if len(items) == 1:
+            results[items[0]] = self.translate(texts[items[0]], lang_tgt, lang_src)
+            return results
+
+        payloads = self._send_rpcs(
+            self._package_rpcs([(texts[i], lang_src, lang_tgt) for i in items])
+        )
+        for n, i in enumerate(items):
+            response_ = payloads.get(str(n + 1))
+            if response_ is None:
+                continue
+            try:
+                results[i] = self._parse_translation(response_)
+            except (IndexError, TypeError) as e:
+                log.debug(f"unable to parse batched translation: {e}")
+        return results
+
+    def detect(self, text):
+        text = str(text)
+        if len(text) >= MAX_TEXT_LENGTH:
+            return log.debug("Warning: Can only detect less than 5000 characters")
+        if len(text) == 0:
+            return ""
+        response_ = self._send_rpc(self._package_rpc(text))
+        return self._parse_detection(response_)
+
+    def detect_and_translate(self, text, lang_tgt="auto"):
+        """
+        Translate text with an auto-detected source language in a single
+        request. The translate response already carries the detected language.
+
+        :return: [translated text, result of `detect`], ["", ""] for an empty
+                 text and None for texts of MAX_TEXT_LENGTH characters or
+                 more, which are not sent at all
+        :raises google_translate_error: if the request fails
+        """
+        lang_tgt = sanitize_lang(lang_tgt)
+        text = str(text)
+        if len(text) >= MAX_TEXT_LENGTH:
+            log.debug("Warning: Can only detect less than 5000 characters")
+            return None
+        if len(text) == 0:
+            return ["", ""]
+        response_ = self._send_rpc(self._package_rpc(text, "auto", lang_tgt))
+        return [self._parse_translation(response_), self._parse_detection(response_)]
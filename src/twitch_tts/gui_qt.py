@@ -1330,7 +1330,9 @@ class TwitchTTSGUI(QMainWindow):
         old_username = self.config_data.get('Trans_Username', '')
         old_oauth = self.config_data.get('Trans_OAUTH', '')
 
-        config = {}
+        # Start from the loaded config so that advanced settings without a
+        # widget (worker pools, caches, ...) are kept when saving
+        config = dict(self.config_data)
 
         # Plain string fields
         plain_string_fields = [
@@ -1,6 +1,7 @@
 """
 GUI entry point for Twitch TTS Bot (PySide6/Qt version)
 """
+import multiprocessing
 import sys
 import os
 import certifi
@@ -11,4 +12,6 @@ os.environ.setdefault('SSL_CERT_FILE', certifi.where())
 from twitch_tts.gui_qt import main
 
 if __name__ == "__main__":
+    # post-processing worker processes of a frozen build start here
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,317 @@
+import bisect
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for detection cache lookups."""
+    return " ".join(text.casefold().split())
+
+
+class _MemoEntry:
+    __slots__ = ("lang", "streak", "since_verify", "confirmed_at")
+
+    def __init__(self, lang: str, confirmed_at: float):
+        self.lang = lang
+        self.streak = 1
+        self.since_verify = 0
+        self.confirmed_at = confirmed_at
+
+
+class UserLangMemo:
+    """Remembers the language of users that consistently write in one language.
+
+    After `threshold` consecutive detections of the same language for a user,
+    `get` returns that language so detection can be skipped. Every
+    `reverify_every`-th message of the user is detected anyway, and the memo
+    for a user decays `ttl` seconds after the last confirming detection.
+    """
+
+    def __init__(self, threshold=3, reverify_every=10, ttl=1800, maxsize=5000, clock=time.monotonic):
+        self.threshold = threshold
+        self.reverify_every = reverify_every
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user: str):
+        if self.threshold <= 0:
+            return None
+        with self._lock:
+            entry = self._users.get(user)
+            if entry is None or entry.streak < self.threshold:
+                return None
+            if self._clock() - entry.confirmed_at > self.ttl:
+                del self._users[user]
+                return None
+            entry.since_verify += 1
+            if self.reverify_every and entry.since_verify >= self.reverify_every:
+                entry.since_verify = 0
+                return None
+            return entry.lang
+
+    def record(self, user: str, lang: str):
+        if self.threshold <= 0 or not lang:
+            return
+        with self._lock:
+            now = self._clock()
+            entry = self._users.get(user)
+            if entry is not None and entry.lang == lang:
+                entry.streak += 1
+                entry.confirmed_at = now
+            else:
+                self._users[user] = _MemoEntry(lang, now)
+            self._users.move_to_end(user)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+# Unicode ranges of scripts, (first, last, script), sorted by first codepoint
+_SCRIPT_RANGES = [
+    (0x0370, 0x03FF, "greek"),
+    (0x0400, 0x052F, "cyrillic"),
+    (0x0530, 0x058F, "armenian"),
+    (0x0590, 0x05FF, "hebrew"),
+    (0x0600, 0x06FF, "arabic"),
+    (0x0750, 0x077F, "arabic"),
+    (0x0900, 0x097F, "devanagari"),
+    (0x0980, 0x09FF, "bengali"),
+    (0x0A00, 0x0A7F, "gurmukhi"),
+    (0x0A80, 0x0AFF, "gujarati"),
+    (0x0B00, 0x0B7F, "oriya"),
+    (0x0B80, 0x0BFF, "tamil"),
+    (0x0C00, 0x0C7F, "telugu"),
+    (0x0C80, 0x0CFF, "kannada"),
+    (0x0D00, 0x0D7F, "malayalam"),
+    (0x0D80, 0x0DFF, "sinhala"),
+    (0x0E00, 0x0E7F, "thai"),
+    (0x0E80, 0x0EFF, "lao"),
+    (0x1000, 0x109F, "myanmar"),
+    (0x10A0, 0x10FF, "georgian"),
+    (0x1100, 0x11FF, "hangul"),
+    (0x1200, 0x137F, "ethiopic"),
+    (0x1780, 0x17FF, "khmer"),
+    (0x1E00, 0x1EFF, "latin"),
+    (0x1F00, 0x1FFF, "greek"),
+    (0x3040, 0x30FF, "kana"),
+    (0x3130, 0x318F, "hangul"),
+    (0x31F0, 0x31FF, "kana"),
+    (0x3400, 0x4DBF, "han"),
+    (0x4E00, 0x9FFF, "han"),
+    (0xAC00, 0xD7AF, "hangul"),
+    (0xF900, 0xFAFF, "han"),
+    (0xFB50, 0xFDFF, "arabic"),
+    (0xFE70, 0xFEFF, "arabic"),
+    (0xFF66, 0xFF9F, "kana"),
+]
+_SCRIPT_STARTS = [r[0] for r in _SCRIPT_RANGES]
+
+# scripts that are (practically) only used by one language in LANGUAGES
+_SCRIPT_LANG = {
+    "hangul": ("ko", 0.95),
+    "kana": ("ja", 0.95),
+    "thai": ("th", 0.95),
+    "lao": ("lo", 0.95),
+    "greek": ("el", 0.95),
+    "armenian": ("hy", 0.95),
+    "georgian": ("ka", 0.95),
+    "ethiopic": ("am", 0.9),
+    "khmer": ("km", 0.95),
+    "myanmar": ("my", 0.95),
+    "sinhala": ("si", 0.95),
+    "gujarati": ("gu", 0.95),
+    "gurmukhi": ("pa", 0.95),
+    "oriya": ("or", 0.95),
+    "kannada": ("kn", 0.95),
+    "malayalam": ("ml", 0.95),
+    "tamil": ("ta", 0.95),
+    "telugu": ("te", 0.95),
+    "bengali": ("bn", 0.9),
+    "hebrew": ("iw", 0.9),
+    "devanagari": ("hi", 0.85),
+}
+
+# letters that mark one language of a shared script
+_SCRIPT_HINTS = {
+    "han": [("zh-TW", "們這個說來時會對學國為麼開見還讓點興樂後電話嗎問過歡"),
+            ("zh-CN", "们这个说来时会对学国为么开见还让点兴乐后电话吗问过欢")],
+    "arabic": [("ur", "ٹڈڑںےھ"), ("fa", "پچژگکی")],
+    "cyrillic": [("uk", "іїєґ"), ("be", "ў"), ("sr", "ђћ"), ("mk", "ѓќѕ"), ("kk", "әғқңөұүһ")],
+}
+_SCRIPT_DEFAULT = {
+    "han": ("zh-CN", 0.5),
+    "arabic": ("ar", 0.85),
+    "cyrillic": ("ru", 0.7),
+}
+
+# the word lists cover about 20 languages, short texts in other languages
+# share enough words with them to be guessed wrong. Such guesses stay below
+# the default Detect_MinConfidence, so they are only used if google fails.
+WORDS_MAX_CONFIDENCE = 0.6
+
+# most common words of latin script languages (and russian/bulgarian)
+_COMMON_WORDS = {
+    "en": "the be to of and a in that have i it for not on with he as you do at this but his by from they we "
+          "her she or an will my all would there their what so up out if about who get which go me when make "
+          "can like just know your good some them see than then now look only think also back how our want "
+          "because these is are was were am has had did does yes yeah thanks thank hello hi please why "
+          "where really what's it's i'm don't",
+    "de": "der die das und ist nicht ich du er sie es wir ihr ein eine einen dem den des zu mit auf für von "
+          "sich auch aus wie was noch nur aber wenn dann doch schon mal hier gut ja nein danke bitte hallo "
+          "heute sehr kann hat habe bin bist sind war oder mehr jetzt warum wo weil alles nichts immer gibt "
+          "geht kein keine mein dein",
+    "fr": "le la les de des du un une et est être en que qui ne pas je tu il elle nous vous ils elles ce "
+          "cette se sur pour dans avec au aux mais ou où son sa ses mon ma mes ton ta plus tout très bien oui "
+          "non merci bonjour salut c'est suis sont fait comme avoir été quoi pourquoi aussi encore j'ai",
+    "es": "el la los las de del y en que un una es por con para no se lo le su al como más pero sus me ya "
+          "muy también fue ha yo tu tú mi está están hola gracias bueno qué sí esto eso porque cuando todo "
+          "nada hay son soy eres estoy vamos",
+    "it": "il lo la i gli le di da in con su per tra un una uno e è non che chi mi ti si ci ma anche come "
+          "più sono sei ho hai ha abbiamo questo questa quello molto bene ciao grazie sì perché cosa tutto "
+          "ancora già dove quando del della dei delle nel nella",
+    "pt": "o a os as de do da dos das em no na nos nas um uma é e que não se por para com mais mas como eu "
+          "você ele ela nós eles meu minha seu sua isso isto muito bem obrigado obrigada olá sim também já "
+          "está estou são tem tenho foi vai vou aqui então porque quando tudo",
+    "nl": "de het een en van ik je jij hij zij wij we ze is zijn was niet dat die dit met op te voor in aan "
+          "er maar ook als om dan nog wel geen heb hebt heeft kan wat waarom hoe waar hallo dank bedankt ja "
+          "nee goed heel veel",
+    "pl": "i w z na do nie to jest się że co jak ale tak od po za o dla tylko już czy mi mnie ja ty on ona "
+          "my wy oni jestem jesteś są być był była bardzo dzięki dziękuję cześć dobrze proszę może też "
+          "jeszcze gdzie kiedy dlaczego",
+    "sv": "och att det som en ett på är av för med till den har de inte om jag du han hon vi ni dom men så "
+          "kan var vad nu här bara också eller mycket tack hej ja nej bra hur varför",
+    "da": "og at det som en et på er af for med til den har de ikke om jeg du han hun vi i men så kan var "
+          "hvad nu her kun også eller meget tak hej ja nej godt hvordan hvorfor",
+    "no": "og at det som en et på er av for med til den har de ikke om jeg du han hun vi dere men så kan "
+          "var hva nå her bare også eller veldig takk hei ja nei bra hvordan hvorfor",
+    "fi": "ja on ei se että hän minä sinä me te he mutta kun niin kuin jos tämä tuo mitä miksi missä "
+          "kiitos moi hei kyllä joo en et oli ovat olen olet vain myös hyvä paljon nyt vielä jo",
+    "tr": "ve bir bu da de ne için ile çok var yok ben sen o biz siz onlar mi mı mu mü değil ama gibi daha "
+          "en her şey merhaba teşekkürler teşekkür sağol evet hayır nasıl neden nerede iyi güzel oldu olan",
+    "id": "yang dan di ke dari ini itu dengan untuk tidak ada saya aku kamu dia kami kita mereka akan sudah "
+          "belum juga bisa apa kenapa mengapa bagaimana terima kasih halo ya nggak gak banget sama",
+    "vi": "và của là có không những được một người trong cho này với các tôi bạn anh em chào cảm ơn rất "
+          "đã đang sẽ",
+    "cs": "a je se v na to že s z do o k i ale jak jsem jsi jsou byl není co proč kde kdy ano ne děkuji "
+          "díky ahoj dobrý velmi taky také jen už ještě",
+    "ro": "și în de la cu pe nu este sunt a fi un o ce care mai dar pentru din ca eu tu el ea noi voi ei "
+          "foarte bine mulțumesc salut da acum aici",
+    "hu": "a az és hogy nem is egy van volt meg de ez azt már csak még ha mint én te ő mi ti ők köszönöm "
+          "szia igen nagyon jó miért hol mikor",
+    "tl": "ang ng mga sa na at ay si ni ko mo ka siya kami tayo sila hindi oo po salamat kumusta ito iyan "
+          "yan lang naman talaga ba din rin",
+    "hr": "i je u na da se za su ne s od to kao ali što sam si smo ste bio bila hvala bok dobro jako gdje "
+          "zašto kada",
+    "ca": "el la els les de del i que a en un una és per amb no es com però més molt jo tu ell ella "
+          "nosaltres sí gràcies hola bon dia també això aquest",
+    "af": "die en van is dit het nie in 'n te wat op vir met ek jy hy sy ons hulle baie dankie goed ja nee "
+          "hoe waar hoekom",
+    "ru": "и в не на я что с он как это а по но ты вы мы у же да нет привет спасибо все так было меня "
+          "тебя очень хорошо почему где когда",
+    "bg": "и в не на аз че с той как това а по но ти вие ние да няма здравей благодаря всичко така беше "
+          "мен теб много добре защо къде кога",
+}
+
+# letters that (almost) only appear in one or two of the languages above
+_LATIN_HINTS = {
+    "ß": ("de",), "ñ": ("es",), "¿": ("es",), "¡": ("es",), "ã": ("pt",), "õ": ("pt", "et"),
+    "œ": ("fr",), "ł": ("pl",), "ą": ("pl",), "ę": ("pl",), "ś": ("pl",), "ź": ("pl",),
+    "ż": ("pl",), "ğ": ("tr",), "ş": ("tr", "ro"), "ı": ("tr",), "ř": ("cs",), "ě": ("cs",),
+    "ů": ("cs",), "ș": ("ro",), "ț": ("ro",), "ő": ("hu",), "ű": ("hu",), "ø": ("da", "no"),
+    "æ": ("da", "no"), "ơ": ("vi",), "ư": ("vi",), "đ": ("vi", "hr"),
+}
+_LATIN_HINTS.update({c: ("vi",) for c in "ạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ"})
+
+_WORD_LANGS = {}
+for _lang, _words in _COMMON_WORDS.items():
+    for _word in _words.split():
+        _WORD_LANGS.setdefault(_word, []).append(_lang)
+_WORD_LANGS = {w: tuple(langs) for w, langs in _WORD_LANGS.items()}
+
+_TOKEN_REGEX = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+
+def _script_of(ch: str) -> str:
+    cp = ord(ch)
+    if cp < 0x0250:
+        return "latin"
+    i = bisect.bisect_right(_SCRIPT_STARTS, cp) - 1
+    if i >= 0 and cp <= _SCRIPT_RANGES[i][1]:
+        return _SCRIPT_RANGES[i][2]
+    return "other"
+
+
+class OfflineDetector:
+    """Detects languages locally, without any network request.
+
+    Texts in a script that is only used by one language are detected by
+    their script. Texts in latin (or cyrillic) script are scored against
+    a table of the most common words and characteristic letters of each
+    language. Short or ambiguous texts yield a low confidence, word based
+    guesses never more than WORDS_MAX_CONFIDENCE.
+    """
+
+    name = "offline"
+
+    def detect(self, text: str) -> tuple[str, float]:
+        """Return (language code, confidence between 0 and 1)."""
+        scripts = Counter(_script_of(ch) for ch in text if ch.isalpha())
+        if not scripts:
+            return "", 0.0
+
+        if scripts["kana"]:
+            # kanji and kana mixed is japanese, kana alone as well
+            return _SCRIPT_LANG["kana"]
+        if scripts["han"] and scripts["hangul"] == 0:
+            scripts["han"] += scripts["latin"]
+
+        script, _count = scripts.most_common(1)[0]
+        if script in _SCRIPT_LANG:
+            return _SCRIPT_LANG[script]
+        if script in _SCRIPT_HINTS:
+            for lang, letters in _SCRIPT_HINTS[script]:
+                if any(ch in letters for ch in text):
+                    return lang, 0.9
+            if script == "cyrillic":
+                lang, confidence = self._detect_words(text)
+                if lang in ("ru", "bg"):
+                    return lang, max(confidence, 0.85)
+            return _SCRIPT_DEFAULT[script]
+        if script == "latin":
+            return self._detect_words(text)
+        return "", 0.0
+
+    def _detect_words(self, text: str) -> tuple[str, float]:
+        scores = Counter()
+        tokens = _TOKEN_REGEX.findall(text.casefold())
+        if not tokens:
+            return "", 0.0
+
+        for token in tokens:
+            langs = _WORD_LANGS.get(token)
+            if not langs:
+                langs = {lang for ch in token for lang in _LATIN_HINTS.get(ch, ())}
+            for lang in langs:
+                scores[lang] += 1 / len(langs)
+
+        if not scores:
+            return "", 0.0
+        ranked = scores.most_common(2)
+        best_lang, best = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        coverage = best / len(tokens)
+        margin = (best - second) / best
+        return best_lang, min(1.0, 2 * coverage) * margin * WORDS_MAX_CONFIDENCE
+
+
+DETECTORS = {
+    OfflineDetector.name: OfflineDetector,
+}
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+log = logging.getLogger(__name__)
+
+# stage kinds, a pipeline runs all INLINE stages, then all BLOCKING stages
+# and then all ORDERED stages
+INLINE = "inline"
+BLOCKING = "blocking"
+ORDERED = "ordered"
+STAGE_KINDS = (INLINE, BLOCKING, ORDERED)
+
+
+@dataclass
+class ChatMessage:
+    """A chat message of any platform, passed through the pipeline stages.
+
+    `text` is rewritten by the stages while `raw` keeps the message as it
+    was received. `reply` is an optional coroutine function sending a
+    message to the chat the message came from, `channel` the channel that
+    reads the message.
+    """
+
+    platform: str
+    user: str
+    text: str
+    emotes: str = ""
+    echo: bool = False
+    reply: object = None
+    channel: object = None
+    raw: str = ""
+    result: dict = None
+    received_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        if not self.raw:
+            self.raw = self.text
+
+
+class Stage:
+    """A named step of the pipeline with timing statistics.
+
+    `fn(msg)` changes the message in place and returns False if the
+    message should be dropped.
+    """
+
+    def __init__(self, name: str, fn, kind=INLINE):
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"unknown stage kind: {kind}")
+        self.name = name
+        self.fn = fn
+        self.kind = kind
+        self.calls = 0
+        self.rejected = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, msg: ChatMessage) -> bool:
+        start = time.perf_counter()
+        try:
+            ok = self.fn(msg) is not False
+        except Exception as e:
+            log.debug(f"stage {self.name} failed: {e}")
+            ok = None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self.seconds += elapsed
+            if ok is None:
+                self.errors += 1
+            elif not ok:
+                self.rejected += 1
+        return bool(ok)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "errors": self.errors,
+                "avg_ms": self.seconds * 1000 / self.calls if self.calls else 0.0,
+            }
+
+
+class MessagePipeline:
+    """Stages every chat message passes, no matter which platform it came from.
+
+    INLINE stages are cheap filters and rewrites that run where the message
+    is fed. BLOCKING stages (network I/O) run on `workers` threads when fed
+    with `feed_async` or `submit`, at most `max_pending` messages wait for
+    them. ORDERED stages run with the results in the order the messages
+    arrived.
+    """
+
+    def __init__(self, workers=4, max_pending=50):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.stages = []
+        self._executor = None
+        self._stopped = False
+        self._slots = None
+        self._last = None
+        self._submit_slots = threading.BoundedSemaphore(self.max_pending)
+        self._submit_lock = threading.Lock()
+        self._last_submitted = None
+
+    def add_stage(self, name: str, fn, kind=INLINE):
+        stage = Stage(name, fn, kind)
+        if self.stages and STAGE_KINDS.index(kind) < STAGE_KINDS.index(self.stages[-1].kind):
+            raise ValueError(f"{kind} stage {name} added after {self.stages[-1].kind} stages")
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        if self._stopped:
+            raise RuntimeError("a stopped pipeline cannot be started again")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="pipeline"
+            )
+        self._slots = None
+        self._last = None
+
+    def stop(self):
+        """Stop the workers, messages that arrive later are dropped."""
+        self._stopped = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _check_running(self) -> bool:
+        if self._stopped:
+            return False
+        if self._executor is None:
+            raise RuntimeError("pipeline was not started")
+        return True
+
+    def run(self, msg: ChatMessage, kind: str) -> bool:
+        """Run the stages of one kind, returns False if the message was dropped."""
+        for stage in self.stages:
+            if stage.kind == kind and not stage(msg):
+                return False
+        return True
+
+    def feed(self, msg: ChatMessage) -> bool:
+        """Run all stages on the calling thread."""
+        return all(self.run(msg, kind) for kind in STAGE_KINDS)
+
+    def submit(self, msg: ChatMessage):
+        """Run the INLINE stages and hand the message to the worker pool.
+
+        Returns right away (unless `max_pending` messages are waiting), the
+        returned future tells whether the message made it through. For
+        threads without an event loop. After `stop`, returns None right away.
+        """
+        if not self._check_running() or not self.run(msg, INLINE):
+            return None
+        self._submit_slots.acquire()
+        with self._submit_lock:
+            prev = self._last_submitted
+            try:
+                future = self._executor.submit(self._process, msg, prev)
+            except RuntimeError:
+                # pipeline was stopped
+                self._submit_slots.release()
+                return None
+            self._last_submitted = future
+        return future
+
+    def _process(self, msg: ChatMessage, prev) -> bool:
+        try:
+            ok = self.run(msg, BLOCKING)
+        finally:
+            self._submit_slots.release()
+        if prev is not None:
+            # submitted earlier, so it already runs on another worker
+            wait([prev])
+        return ok and not self._stopped and self.run(msg, ORDERED)
+
+    async def feed_async(self, msg: ChatMessage) -> bool:
+        """Run all stages without blocking the event loop.
+
+        Several messages go through the BLOCKING stages concurrently, but
+        the ORDERED stages see them in the order they were fed: the previous
+        message's completion future is captured before the first await.
+        After `stop`, returns False right away.
+        """
+        if not self._check_running() or not self.run(msg, INLINE):
+            return False
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        loop = asyncio.get_running_loop()
+        prev = self._last
+        done = loop.create_future()
+        self._last = done
+        try:
+            async with self._slots:
+                try:
+                    ok = await loop.run_in_executor(self._executor, self.run, msg, BLOCKING)
+                except RuntimeError:
+                    # pipeline was stopped
+                    return False
+            if prev is not None:
+                await prev
+            return ok and not self._stopped and self.run(msg, ORDERED)
+        finally:
+            done.set_result(None)
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
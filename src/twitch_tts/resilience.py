@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a service that is known to be failing."""
+
+
+class RateLimited(CircuitOpen):
+    """Raised instead of calling a service whose request budget is used up."""
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average and bursts of `burst`.
+
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate=0.0, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        return self.acquire(timeout=0.0)
+
+    def acquire(self, timeout=0.0) -> bool:
+        """Takes a token, waiting up to `timeout` seconds for one to refill."""
+        if self.rate <= 0:
+            return True
+        deadline = self._clock() + timeout
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1 - 1e-9:  # refills may land just short of a token
+                    self._tokens = max(0.0, self._tokens - 1)
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            self._sleep(wait)
+
+
+class CircuitBreaker:
+    """Stops calling a service after `failure_threshold` failures in a row.
+
+    While open, calls are rejected right away. After `reset_timeout` seconds
+    a single trial call is let through (half open): success closes the
+    breaker, failure opens it again with the timeout doubled, up to
+    `max_reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=10.0, max_reset_timeout=300.0, clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max(reset_timeout, max_reset_timeout)
+        self.state = CLOSED
+        self.trips = 0
+        self._clock = clock
+        self._failures = 0
+        self._backoff = reset_timeout
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self._clock() - self._opened_at >= self._backoff:
+                self.state = HALF_OPEN
+                self._trial_running = False
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self):
+        """Gives back a call that was allowed but never made."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                log.info("service recovered, closing circuit breaker")
+            self.state = CLOSED
+            self._failures = 0
+            self._backoff = self.reset_timeout
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN:
+                self._backoff = min(self._backoff * 2, self.max_reset_timeout)
+                self._open()
+            elif self.state == CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.trips += 1
+        self._opened_at = self._clock()
+        self._trial_running = False
+        log.warning(f"service is failing, pausing requests for {self._backoff:.0f}s")
+
+
+class Guard:
+    """Runs calls to a remote service through a breaker and a rate limiter.
+
+    Calls over the rate wait up to `wait` seconds for the budget to refill
+    before they are rejected.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, bucket: TokenBucket, wait=0.0):
+        self.breaker = breaker
+        self.bucket = bucket
+        self.wait = wait
+        self.rejected = 0
+
+    def call(self, fn, *args, **kwargs):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpen("circuit breaker is open")
+        if not self.bucket.acquire(self.wait):
+            self.breaker.release()
+            self.rejected += 1
+            raise RateLimited("request budget used up")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def stats(self):
+        return {
+            "state": self.breaker.state,
+            "trips": self.breaker.trips,
+            "rejected": self.rejected,
+        }
@@ -1,5 +1,16 @@
-from twitch_tts.google_translate import google_translator
+from twitch_tts.google_translate import MAX_TEXT_LENGTH as GOOGLE_MAX_TEXT_LENGTH, google_translator
 from googleapiclient.discovery import build
+from twitch_tts.batching import BatchTranslator
+from twitch_tts.audio import SAMPLE_FORMAT, Playback, PostProcessor, playback_speed
+from twitch_tts.cache import AudioCache, TTLCache
+from twitch_tts.engines import DEFAULT_TIMEOUT, EngineRegistry, TranslationEngine
+from twitch_tts.deepl_client import DeepLClient, MAX_TEXTS as DEEPL_MAX_TEXTS, deepl_quota_exceeded
+from twitch_tts.resilience import CircuitBreaker, Guard, TokenBucket
+from twitch_tts.tts_pipeline import FairQueue, TtsPipeline
+from twitch_tts.channels import ChannelRegistry
+from twitch_tts.filters import strip_emote_ranges
+from twitch_tts.pipeline import BLOCKING, INLINE, ORDERED, ChatMessage, MessagePipeline
+from twitch_tts.langdetect import DETECTORS, UserLangMemo, normalize_text
 from twitch_tts import constants
 from twitch_tts import conf
 from twitch_tts import yt
@@ -8,190 +19,187 @@ import pytchat
 import certifi
 import deepl
 import asyncio
+import io
 import logging
+import multiprocessing
 import os
 
 # Ensure SSL certificates are found in PyInstaller bundles
 os.environ.setdefault('SSL_CERT_FILE', certifi.where())
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
 import pygame
-import queue
+import itertools
 import random
 import shutil
 import signal
 import sys
 import threading
 import time
-import re
 
-from datetime import datetime
 from gtts import gTTS
 from twitchio import Client
 from twitch_tts.versioning import get_version
 
 version = get_version()
 
-pygame.mixer.init()
+# set up by `init`
+_conf = None
 
-_user_to_language_map = {}
+_tts_pipeline = None
+_post_processor = None
+_tts_file_counter = itertools.count()
 
-_conf = conf.load_config()
+_playback = Playback(lambda: pygame.mixer.music.get_busy() or pygame.mixer.get_busy())
 
-_tts_queue = queue.Queue()
-
-_stopped = False
 _bot_loop = None
+_channels = ChannelRegistry()
 
+# stages shared by twitch and youtube messages
+_message_pipeline = None
+_yt_reader = None
 
-def start_tts():
-    global _stopped
-    _stopped = False
-
-
-def stop_tts():
-    global _stopped
-    _stopped = True
-    _tts_queue.empty()
-    pygame.mixer.music.stop()
-    if bot and bot.loop and bot.loop.is_running():
-        asyncio.run_coroutine_threadsafe(bot.close(), bot.loop)
-
-
-def queue_tts(text: str, lang: str):
-    global _tts_queue
-    _tts_queue.put([text, lang])
-
-
-def tts_thread_fn():
-    global _tts_queue
-
-    while True:
-        q = _tts_queue.get()
-        if q is None:
-            time.sleep(1)
-            continue
-
-        text = q[0]
-        tl = q[1]
-        synthesize(text, tl)
 
+def start_tts(channel=None):
+    """Start reading `channel`, or all channels."""
+    for ch in [channel] if channel else _channels:
+        ch.stopped = False
 
-def tts_thread():
-    if _conf.TTS_IN or _conf.TTS_OUT:
-        thread = threading.Thread(target=tts_thread_fn)
-        thread.start()
 
+def stop_tts(channel=None):
+    """Stop reading `channel`, or all channels.
 
-def yt_on_message(item):
-    "Runs every time a message is sent in chat."
+    The bot disconnects once none of its channels is read anymore.
+    """
+    for ch in [channel] if channel else _channels:
+        ch.stopped = True
+    if _tts_pipeline:
+        # drops queued and in-flight messages and stops the current one
+        _tts_pipeline.flush(channel.name if channel else None)
+    elif not channel:
+        stop_playback()
+    if not all(ch.stopped for ch in _channels):
+        return
+    if _post_processor:
+        # no worker processes are left behind, even if the bot never ran
+        _post_processor.stop()
+    if bot and bot.loop and bot.loop.is_running():
+        asyncio.run_coroutine_threadsafe(bot.close(), bot.loop)
 
-    author = item.author.name
-    message = item.message
-    log.debug(f"{author}: {message}")
 
-    if message.startswith("!"):
-        if message == '!tts start':
-            start_tts()
-        elif message == '!tts stop':
-            stop_tts()
+def queue_tts(channel, text: str, lang: str, user: str = ""):
+    # messages still in detection/translation when tts was stopped end here
+    if not _tts_pipeline or channel.stopped:
         return
-
-    if _stopped:
+    if channel.conf.ReadOnlyTheseLang and (lang not in channel.conf.ReadOnlyTheseLang):
+        log.debug(f"language configured to be not read: {lang}")
         return
+    _tts_pipeline.put(text, lang, user, channel.name)
 
-    user = author.lower()
 
-    in_text = message
-
-    # Skip @mentions
-    if should_ignore_mentions(in_text):
-        return
+def tts_stats():
+    """Queue depth, drop and merge counters of the TTS pipeline."""
+    return _tts_pipeline.stats() if _tts_pipeline else {}
 
-    if user in _conf.Ignore_Users:
-        log.debug(f"{user} is in _Ignore_Users")
-        return
-
-    for w in _conf.Ignore_Line:
-        if w in in_text:
-            log.debug(f"{w} is in _Ignore_Line")
-            return
 
-    in_text = replace_delete_words(in_text)
-    in_text = replace_links(in_text)
-    in_text = remove_emojis(in_text)
-    # in_text = replace_emotes(in_text, ctx)
-    in_text = delete_mention_names(in_text)
-    in_text = " ".join(in_text.split())
+def configure_tts_queues(tts_queue: FairQueue):
+    """Every channel has its own queue, the synthesis workers are shared."""
+    for channel in _channels:
+        tts_queue.configure(
+            channel.name,
+            maxsize=channel.conf.TTS_Queue_Max,
+            policy=channel.conf.TTS_Queue_Policy,
+            per_user=channel.conf.TTS_Queue_Per_User,
+            max_age=channel.conf.TTS_Queue_Max_Age,
+            merge=channel.conf.TTS_Queue_Merge,
+        )
 
-    if not in_text:
-        log.debug(f"message is empty after cleanup")
-        return
 
-    log.debug(f"--- Detect Language ---")
-    lang_detect = determine_lang_detect(in_text, user)
-    log.debug(f"lang_detect: {lang_detect}")
-    log.debug(f"--- Select Destinate Language ---")
-    lang_dest = determine_lang_dest(lang_detect)
-    log.debug(f"lang_dest: {lang_dest}")
+def create_post_processor():
+    """Post-processes the synthesized sound, or None if the mixer format is unknown."""
+    frequency, sample_format, channels = pygame.mixer.get_init()
+    if sample_format != SAMPLE_FORMAT:
+        log.warning(f"unsupported mixer format {sample_format}, sound is not post-processed")
+        return None
+    post_processor = PostProcessor(
+        processes=_conf.TTS_Process_Workers, channels=channels, rate=frequency
+    )
+    post_processor.start()
+    return post_processor
 
-    m = in_text.split(":")
-    if len(m) >= 2:
-        if m[0] in _conf.TargetLangs:
-            lang_dest = m[0]
-            in_text = ":".join(m[1:])
-    else:
-        if lang_detect in _conf.Ignore_Lang:
-            log.debug(f"lang_detect ({lang_detect}) is ignored, returning...")
-            return
 
-    log.debug(f"lang_dest: {lang_dest} in_text: {in_text}")
+def tts_thread():
+    global _tts_pipeline, _post_processor
+    if any(ch.conf.TTS_IN or ch.conf.TTS_OUT for ch in _channels):
+        _post_processor = create_post_processor()
+        tts_queue = FairQueue()
+        configure_tts_queues(tts_queue)
+        _tts_pipeline = TtsPipeline(
+            synthesize,
+            synth_play_audio,
+            wait_for_playback,
+            stop_playback,
+            workers=_conf.TTS_Synth_Workers,
+            prefetch=_conf.TTS_Prefetch,
+            tts_queue=tts_queue,
+        )
+        _tts_pipeline.start()
 
-    ret = {
-        "user": user,
-        "reactions": [],
-    }
 
-    ret["reactions"].append(
-        {
-            "type": "detected",
-            "sound": _conf.TTS_IN,
-            "lang": lang_detect,
-            "text": in_text,
-        }
-    )
+def yt_on_message(item):
+    "Runs every time a message is sent in chat."
 
-    if lang_detect != lang_dest:
-        log.debug(f"--- Translation ---")
-        ret["reactions"].append(
-            {
-                "type": "translated",
-                "sound": _conf.TTS_OUT,
-                "lang": lang_dest,
-                "text": translate_text(in_text, lang_detect, lang_dest),
-            }
-        )
+    # the youtube chat is read out in the first channel
+    channel = _channels.default
+    user = item.author.name.lower()
+    if not admit_message(channel, user, item.message):
+        return
 
-    react(ret)
+    log.debug(f"{user}: {item.message}")
+    # don't hold up the chat reader while the message is translated
+    _message_pipeline.submit(ChatMessage("youtube", user, item.message, channel=channel))
 
 
 def yt_thread_fn():
+    global _yt_reader
+    _yt_reader = yt.ChatReader(
+        lambda video_id: pytchat.create(video_id=video_id, interruptable=False),
+        yt_on_message,
+    )
     youtube = build("youtube", "v3", developerKey=_conf.YoutubeApiKey)
-    channel_id = yt.resolve_channel_id(youtube, _conf.YoutubeChannelUrl)
+    quota = yt.QuotaMeter()
+    channel_id = yt.resolve_channel_id(
+        youtube,
+        _conf.YoutubeChannelUrl,
+        quota=quota,
+        cache=yt.ChannelIdCache(_conf.Youtube_Channel_Cache_File),
+    )
+    if not channel_id:
+        print(f"ERROR: Youtube channel not found: {_conf.YoutubeChannelUrl}")
+        return
+    checker = yt.LiveChecker(
+        youtube,
+        quota=quota,
+        min_interval=_conf.Youtube_Live_Check_Min,
+        max_interval=_conf.Youtube_Live_Check_Max,
+    )
+    last_report = time.time()
     while True:
+      if time.time() - last_report >= 3600:
+          print(f"Youtube API quota used in the last hour: {quota.per_hour()} units")
+          last_report = time.time()
+
       log.debug(f"Checking if channel '{channel_id}' is live...")
-      video_id = yt.get_live_video_id(youtube, channel_id)
+      video_id = checker.check(channel_id)
 
       if not video_id:
-          log.debug("Channel is not live right now. Will check again in 60 seconds.")
-          time.sleep(60)
+          log.debug(f"Channel is not live right now. Will check again in {checker.interval:.0f} seconds.")
+          if not _yt_reader.wait(checker.interval):
+              break
           continue
 
       log.debug(f"Live video found: {video_id}, start reading chat...")
-      chat = pytchat.create(video_id=video_id, interruptable=False)
-
-      while chat.is_alive():
-          for item in chat.get().sync_items():
-              yt_on_message(item)
+      _yt_reader.run(video_id)
+      log.debug(f"Chat of {video_id} ended, {_yt_reader.reconnects} reconnects so far")
 
 
 def yt_thread():
@@ -216,8 +224,6 @@ def create_tmp_dir(tmp_dir: str):
 
 logging.basicConfig()
 log = logging.getLogger(__name__)
-if _conf.Debug:
-    log.setLevel(logging.DEBUG)
 
 
 ##########################################
@@ -225,199 +231,405 @@ if _conf.Debug:
 # Simple echo bot.
 log.debug("XXX: simple echo bot")
 bot = None
-_translator = google_translator(url_suffix=_conf.url_suffix)
+
+
+def create_translator():
+    """Create the google translator, reusing the current one (and its
+    pooled keep-alive connections) if the settings did not change."""
+    current = globals().get("_translator")
+    if current and current.is_compatible(
+        _conf.url_suffix,
+        _conf.GoogleTranslate_PoolSize,
+        _conf.GoogleTranslate_Retries,
+        _conf.GoogleTranslate_Backoff,
+    ):
+        return current
+    if current:
+        current.close()
+    return google_translator(
+        url_suffix=_conf.url_suffix,
+        pool_size=_conf.GoogleTranslate_PoolSize,
+        retries=_conf.GoogleTranslate_Retries,
+        backoff_factor=_conf.GoogleTranslate_Backoff,
+    )
+
+
+def create_batch_translator():
+    """Batch google translations, or None if batching is disabled."""
+    if _conf.GoogleTranslate_Batch_Window <= 0 or _conf.GoogleTranslate_Batch_Max <= 1:
+        return None
+    return BatchTranslator(
+        lambda texts, lang_tgt: _google_guard.call(_translator.translate_batch, texts, lang_tgt),
+        window=_conf.GoogleTranslate_Batch_Window,
+        max_items=_conf.GoogleTranslate_Batch_Max,
+    )
+
+
+def create_google_guard():
+    """Circuit breaker and rate limiter shared by all google requests."""
+    return Guard(
+        CircuitBreaker(
+            failure_threshold=_conf.GoogleTranslate_Breaker_Failures,
+            reset_timeout=_conf.GoogleTranslate_Breaker_Reset,
+            max_reset_timeout=_conf.GoogleTranslate_Breaker_Max_Reset,
+        ),
+        TokenBucket(rate=_conf.GoogleTranslate_Rate, burst=_conf.GoogleTranslate_Burst),
+        wait=_conf.Translator_Timeouts.get("google", DEFAULT_TIMEOUT),
+    )
+
+
+def create_deepl_client():
+    """Client for the official DeepL API, or None without an auth key.
+
+    Reuses the current client (and its pooled connections) if the settings
+    did not change.
+    """
+    current = globals().get("_deepl_client")
+    if not _conf.DeepL_Auth_Key:
+        if current:
+            current.close()
+        return None
+    if current and current.is_compatible(_conf.DeepL_Auth_Key, _conf.DeepL_Api_Url):
+        return current
+    if current:
+        current.close()
+    return DeepLClient(_conf.DeepL_Auth_Key, api_url=_conf.DeepL_Api_Url)
+
+
+def create_deepl_batch_translator():
+    """Batch DeepL API translations, or None if batching is disabled."""
+    if not _deepl_client or _conf.DeepL_Batch_Window <= 0:
+        return None
+    return BatchTranslator(
+        lambda texts, langs: _deepl_client.translate_batch(texts, langs[1], langs[0]),
+        window=_conf.DeepL_Batch_Window,
+        max_items=DEEPL_MAX_TEXTS,
+    )
+
+
+def create_detectors():
+    detectors = {}
+    for name in _conf.Detectors:
+        if name in DETECTORS:
+            detectors[name] = DETECTORS[name]()
+        elif name != "google":
+            log.warning(f"unknown language detector in config: {name}")
+    return detectors
+
+
+# set up by `init` and `reload_config`
+_translator = None
+_google_guard = None
+_batch_translator = None
+_deepl_client = None
+_deepl_batch_translator = None
+_translation_chain = None
+_translation_cache = None
+_detectors = {}
+_detect_cache = None
+_user_lang_memo = None
+_audio_cache = None
+
+_caches_loaded = False
+
+
+def load_caches():
+    global _caches_loaded
+    if _conf.Translation_Cache_File:
+        _translation_cache.load(_conf.Translation_Cache_File)
+        log.debug(f"loaded {len(_translation_cache)} cached translations")
+    _audio_cache.load()
+    log.debug(f"loaded {len(_audio_cache)} cached sounds")
+    _caches_loaded = True
+
+
+def save_caches():
+    if not _caches_loaded:
+        # don't overwrite the cache files if starting up failed early
+        return
+    log.debug(f"translation cache: {_translation_cache.stats()}")
+    log.debug(f"detect cache: {_detect_cache.stats()}")
+    log.debug(f"audio cache: {_audio_cache.stats()}")
+    if _conf.Translation_Cache_File:
+        try:
+            _translation_cache.save(_conf.Translation_Cache_File)
+        except Exception as e:
+            log.debug(f"unable to save translation cache: {e}")
 
 
 def reload_config():
     """Reload config from disk and update runtime settings."""
-    global _conf, _translator, _user_to_language_map
+    global _conf, _translator, _google_guard, _batch_translator, _detectors
+    global _deepl_client, _deepl_batch_translator, _translation_chain
     _conf = conf.load_config()
-    _translator = google_translator(url_suffix=_conf.url_suffix)
-    _user_to_language_map = {}
+    _translator = create_translator()
+    _google_guard = create_google_guard()
+    _batch_translator = create_batch_translator()
+    _deepl_client = create_deepl_client()
+    _deepl_batch_translator = create_deepl_batch_translator()
+    _translation_chain = create_translation_chain()
+    _detectors = create_detectors()
+    _channels.update(conf.channel_confs(_conf))
+    if _tts_pipeline:
+        configure_tts_queues(_tts_pipeline.queue)
+    _translation_cache.configure(
+        _conf.Translation_Cache_Size, _conf.Translation_Cache_TTL
+    )
+    _detect_cache.configure(_conf.Detect_Cache_Size, _conf.Detect_Cache_TTL)
+    _audio_cache.configure(int(_conf.TTS_Cache_MB * 1024 * 1024), _conf.TTS_Cache_Dir)
+    _user_lang_memo.threshold = _conf.Detect_UserMemo_After
+    _user_lang_memo.reverify_every = _conf.Detect_UserMemo_Reverify
+    _user_lang_memo.ttl = _conf.Detect_UserMemo_TTL
     if _conf.Debug:
         log.setLevel(logging.DEBUG)
     else:
         log.setLevel(logging.INFO)
 
 
+def init():
+    """Set up the mixer, load the config and create what is built from it.
+
+    Nothing of this happens on import: post-processing worker processes
+    import this module again (as __mp_main__), and must not open an audio
+    device or ask for input on a broken config.
+    """
+    global _translation_cache, _detect_cache, _user_lang_memo, _audio_cache
+    pygame.mixer.init()
+    _translation_cache = TTLCache()
+    _detect_cache = TTLCache()
+    _user_lang_memo = UserLangMemo()
+    _audio_cache = AudioCache()
+    reload_config()
+
+
 def _create_bot():
     """Create bot instance - must be called from the thread with the event loop"""
     global bot
     bot = Client(
         token="oauth:" + _conf.Trans_OAUTH,
-        initial_channels=[_conf.Twitch_Channel],
+        initial_channels=_channels.names(),
         loop=asyncio.get_event_loop(),
     )
     _register_bot_events()
 
 
-replace_links_regex = re.compile(r'https?://\S+')
-def replace_links(message: str):
-    if _conf.Ignore_Links:
-        replacement = _conf.Delete_Links if _conf.Delete_Links else ''
-        message = replace_links_regex.sub(replacement, message)
-    return message
-
-
-# Regex to match most emoji characters
-emoji_regex = re.compile(
-    "["
-    "\U0001F600-\U0001F64F"  # emoticons
-    "\U0001F300-\U0001F5FF"  # symbols & pictographs
-    "\U0001F680-\U0001F6FF"  # transport & map symbols
-    "\U0001F1E0-\U0001F1FF"  # flags
-    "\U00002702-\U000027B0"  # dingbats
-    "\U000024C2-\U0001F251"  # enclosed characters
-    "\U0001F900-\U0001F9FF"  # supplemental symbols
-    "\U0001FA00-\U0001FA6F"  # chess symbols
-    "\U0001FA70-\U0001FAFF"  # symbols and pictographs extended-a
-    "\U00002600-\U000026FF"  # misc symbols
-    "\U0001F700-\U0001F77F"  # alchemical symbols
-    "]+", 
-    flags=re.UNICODE
-)
-
-def remove_emojis(message: str):
-    if _conf.Ignore_Emojis:
-        message = emoji_regex.sub('', message)
-    return message
-
-
-def should_ignore_mentions(message: str):
-    """Check if a message should be ignored due to @mentions."""
-    if not _conf.Ignore_Mentions:
-        return False
-    mentions = re.findall(r'@(\w+)', message)
-    if not mentions:
-        return False
-    if _conf.Mentions_Allow_Channel:
-        other_mentions = [m for m in mentions if m.lower() != _conf.Twitch_Channel.lower()]
-        if not other_mentions:
-            return False
-    log.debug(f"message contains mentions, skipping")
-    return True
+def determine_lang_override(user: str, channel):
+    """Language configured for the user, or None if it has to be detected."""
+    if user in channel.conf.UserToLangMap:
+        return channel.conf.UserToLangMap[user]
+
+    if channel.conf.AssignRandomLangToUser:
+        # setdefault: detection runs on several worker threads at once
+        return channel.user_to_language_map.setdefault(
+            user, random.choice(channel.conf.AssignRandomLangToUser)
+        )
 
+    if channel.conf.lang_SkipDetect:
+        return channel.conf.lang_Default
 
-def delete_mention_names(message: str):
-    """Remove @username from message text."""
-    if _conf.Delete_Mention_Names:
-        message = re.sub(r'@\w+', '', message)
-    return message
+    return None
 
 
-def replace_delete_words(message: str):
-    for w in _conf.Delete_Words:
-        message = message.replace(w, "")
-    return message
+def determine_lang_known(text: str, user: str, channel):
+    """Language of the text if it is known without a detection request."""
+    lang = determine_lang_override(user, channel)
+    if lang is not None:
+        return lang
 
+    lang = _user_lang_memo.get(user)
+    if lang is not None:
+        log.debug(f"[User Language Memo] {user}: {lang}")
+        return lang
 
-def replace_emotes(message: str, ctx):
-    if not ctx.tags or not ctx.tags["emotes"]:
-        return message
+    lang = _detect_cache.get((normalize_text(text),))
+    if lang is not None:
+        log.debug("[Detect Cache] hit")
+        _user_lang_memo.record(user, lang)
+        return lang
 
-    emote_list = []
-    emotes_split = ctx.tags["emotes"].split("/")
-    for emote in emotes_split:
-        log.debug(emote)
-        emote_id, emote_pos = emote.split(":")
+    return None
 
-        log.debug(f"e_pos:{emote_pos}")
-        if "," in emote_pos:
-            ed_pos = emote_pos.split(",")
-            for e in ed_pos:
-                log.debug(f"{e}")
-                log.debug(e.split("-"))
-                e_s, e_e = e.split("-")
-                log.debug(ctx.content[int(e_s) : int(e_e) + 1])
 
-                emote_list.append(ctx.content[int(e_s) : int(e_e) + 1])
-        else:
-            e = emote_pos
-            e_s, e_e = e.split("-")
-            log.debug(ctx.content[int(e_s) : int(e_e) + 1])
+def remember_lang_detect(text: str, user: str, lang: str):
+    if lang:
+        _detect_cache.put((normalize_text(text),), lang)
+        _user_lang_memo.record(user, lang)
 
-            emote_list.append(ctx.content[int(e_s) : int(e_e) + 1])
 
-    log.debug(f"message with emote:{message}")
-    for w in sorted(emote_list, key=len, reverse=True):
-        log.debug(w)
-        message = message.replace(w, "")
+def determine_lang_detect_remote(text: str, user: str) -> str:
+    # use google translator ---
+    try:
+        detect_result = _google_guard.call(_translator.detect, text)
+        log.debug(f"detect_result: {detect_result}")
+        lang = detect_result[0]
+    except Exception as e:
+        log.debug(f"detect_exception: {e}")
+        return ""
+    remember_lang_detect(text, user, lang)
+    return lang
+
+
+def determine_lang_detect_chain(text: str, user: str, channel, combined: bool = False):
+    """Ask the configured detectors in order until one is confident enough.
+
+    "google" is always confident. With `combined`, google also translates
+    the text (see determine_lang_detect_and_translate), unless an earlier
+    detector guessed a language the channel ignores anyway.
+    Returns (lang_detect, translated_text).
+    """
+    guess, guess_confidence = "", 0.0
+    for name in _conf.Detectors:
+        if name == "google":
+            if combined and guess not in channel.conf.Ignore_Lang:
+                lang, translated_text = determine_lang_detect_and_translate(text, user, channel)
+            else:
+                lang, translated_text = determine_lang_detect_remote(text, user), None
+            if lang:
+                return lang, translated_text
+            continue
+
+        if name not in _detectors:
+            continue
+        lang, confidence = _detectors[name].detect(text)
+        log.debug(f"[{name} detect] {lang} ({confidence:.2f})")
+        if lang and confidence >= _conf.Detect_MinConfidence:
+            remember_lang_detect(text, user, lang)
+            return lang, None
+        if lang and confidence > guess_confidence:
+            guess, guess_confidence = lang, confidence
 
-    log.debug(f"message without emote:{message}")
-    return message
+    # nobody was confident (or google failed), go with the best guess
+    return guess, None
 
 
-def determine_lang_detect(text: str, user: str) -> str:
-    if user in _conf.UserToLangMap:
-        return _conf.UserToLangMap[user]
+def determine_lang_detect(text: str, user: str, channel) -> str:
+    lang = determine_lang_known(text, user, channel)
+    if lang is not None:
+        return lang
+    return determine_lang_detect_chain(text, user, channel)[0]
 
-    if _conf.AssignRandomLangToUser:
-        if user not in _user_to_language_map:
-            _user_to_language_map[user] = random.choice(_conf.AssignRandomLangToUser)
-        return _user_to_language_map[user]
 
-    if _conf.lang_SkipDetect:
-        return _conf.lang_Default
+def determine_lang_detect_and_translate(text: str, user: str, channel):
+    """Detect the language and translate to lang_TransToHome in one request.
 
-    # use google translator ---
+    Returns (lang_detect, translated_text). translated_text is None when the
+    text already is in lang_TransToHome and needs a different destination.
+    """
+    lang_home = channel.conf.lang_TransToHome
     try:
-        detect_result = _translator.detect(text)
+        translated_text, detect_result = _google_guard.call(
+            _translator.detect_and_translate, text, lang_home
+        )
         log.debug(f"detect_result: {detect_result}")
-        return detect_result[0]
+        lang_detect = detect_result[0]
     except Exception as e:
         log.debug(f"detect_exception: {e}")
-        return ""
+        # the translation failed as well, no need to request it again
+        return "", ""
+
+    remember_lang_detect(text, user, lang_detect)
+    if lang_detect == lang_home:
+        return lang_detect, None
+    if translated_text:
+        _translation_cache.put(
+            (text, lang_detect, lang_home, "google"), translated_text
+        )
+    return lang_detect, translated_text
 
 
-def determine_lang_dest(lang_detect: str) -> str:
-    if lang_detect != _conf.lang_TransToHome:
-        return _conf.lang_TransToHome
-    return _conf.lang_HomeToOther
+def can_detect_and_translate(text: str) -> bool:
+    """Whether detection and translation can share one google request."""
+    if _conf.Translator != "google":
+        return False
+    # google does not take texts this long, the combined request would be wasted
+    if len(text) >= GOOGLE_MAX_TEXT_LENGTH:
+        return False
+    # an explicit "lang:" prefix changes the destination language
+    m = text.split(":")
+    if len(m) >= 2 and m[0] in _conf.TargetLangs:
+        return False
+    return True
+
+
+def determine_lang_dest(lang_detect: str, channel) -> str:
+    if lang_detect != channel.conf.lang_TransToHome:
+        return channel.conf.lang_TransToHome
+    return channel.conf.lang_HomeToOther
 
 
 def translate_text_deepl(text: str, lang_detect: str, lang_dest: str) -> str:
+    source_lang = _conf.deepl_lang_dict[lang_detect]
+    target_lang = _conf.deepl_lang_dict[lang_dest]
+    log.debug(f"[DeepL Translate]({source_lang} > {target_lang})")
     try:
-        if (
-            lang_detect in _conf.deepl_lang_dict.keys()
-            and lang_dest in _conf.deepl_lang_dict.keys()
-        ):
-            log.debug(
-                f"[DeepL Translate]({_conf.deepl_lang_dict[lang_detect]} > {_conf.deepl_lang_dict[lang_dest]})"
-            )
-            return deepl.translate(
-                source_language=_conf.deepl_lang_dict[lang_detect],
-                target_language=_conf.deepl_lang_dict[lang_dest],
-                text=text,
-            )
+        if _deepl_batch_translator:
+            return _deepl_batch_translator.translate(text, (source_lang, target_lang))
+        if _deepl_client:
+            return _deepl_client.translate(text, target_lang, source_lang)
+    except deepl_quota_exceeded as e:
+        log.warning(f"{e}")
+        raise
+    return deepl.translate(
+        source_language=source_lang,
+        target_language=target_lang,
+        text=text,
+    )
 
-        return translate_text_google(text, lang_dest)
-    except Exception as e:
-        log.debug(e)
-        return ""
 
+def deepl_supports(lang_detect: str, lang_dest: str) -> bool:
+    return lang_detect in _conf.deepl_lang_dict and lang_dest in _conf.deepl_lang_dict
+
+
+def translate_text_google(text: str, lang_detect: str, lang_dest: str) -> str:
+    log.debug("[Google Translate]")
+    if _batch_translator:
+        return _batch_translator.translate(text, lang_dest)
+    return _google_guard.call(_translator.translate, text, lang_dest)
+
+
+_engines = EngineRegistry()
+_engines.register(TranslationEngine("deepl", translate_text_deepl, deepl_supports))
+_engines.register(TranslationEngine("google", translate_text_google))
+
+
+def create_translation_chain():
+    """The configured Translator followed by the Translator_Fallback engines."""
+    if _engines.get(_conf.Translator) is None:
+        print(f"ERROR: config TRANSLATOR is set the wrong value with [{_conf.Translator}]")
+    for name in _engines.names():
+        _engines.get(name).timeout = _conf.Translator_Timeouts.get(name, DEFAULT_TIMEOUT)
+    current = globals().get("_translation_chain")
+    if current:
+        current.close()
+    return _engines.chain(
+        [_conf.Translator] + _conf.Translator_Fallback,
+        hedge_after=_conf.Translator_Hedge_After,
+        workers=_conf.Translate_Workers * 2,
+    )
 
-def translate_text_google(text: str, lang_dest: str) -> str:
-    try:
-        log.debug("[Google Translate]")
-        return _translator.translate(text, lang_dest)
-    except Exception as e:
-        log.debug(e)
-        return ""
 
 
 def translate_text(text: str, lang_detect: str, lang_dest: str) -> str:
-    # use deepl --------------
-    # (try to use deepl, but if the language is not supported, text will be translated by google!)
-    if _conf.Translator == "deepl":
-        return translate_text_deepl(text, lang_detect, lang_dest)
+    # cached under the engine that answered, which may be a fallback
+    for name in [_conf.Translator] + _conf.Translator_Fallback:
+        translated_text = _translation_cache.get((text, lang_detect, lang_dest, name))
+        if translated_text is not None:
+            log.debug(f"[Translation Cache] hit ({name})")
+            return translated_text
 
-    # NOT use deepl ----------
-    if _conf.Translator == "google":
-        return translate_text_google(text, lang_dest)
+    translated_text, engine = translate_text_engine(text, lang_detect, lang_dest)
+    # failed translations are empty, those should be retried next time
+    if translated_text:
+        _translation_cache.put((text, lang_detect, lang_dest, engine), translated_text)
+    return translated_text
 
-    print(f"ERROR: config TRANSLATOR is set the wrong value with [{_conf.Translator}]")
-    return ""
 
+def translate_text_engine(text: str, lang_detect: str, lang_dest: str):
+    """Return (translation, engine name) from the translation chain."""
+    translated_text, engine = _translation_chain.translate(text, lang_detect, lang_dest)
+    if engine:
+        log.debug(f"translated by {engine}")
+    return translated_text, engine
 
 
 def _register_bot_events():
@@ -433,12 +645,13 @@ def _register_bot_events():
         "Called when a user joins a channel."
         if user.name.lower() != _conf.Trans_Username.lower():
             return
-        if channel.name != _conf.Twitch_Channel:
+        bot_channel = _channels.get(channel.name)
+        if bot_channel is None:
             return
 
-        if _conf.Bot_SendWhisper:
-            log.debug(f"sending startup message: {_conf.Bot_StartupMessage}")
-            await channel.send(_conf.Bot_StartupMessage)
+        if bot_channel.conf.Bot_SendWhisper:
+            log.debug(f"sending startup message to {channel.name}: {bot_channel.conf.Bot_StartupMessage}")
+            await channel.send(bot_channel.conf.Bot_StartupMessage)
 
     @bot.event()
     async def event_raw_data(data):
@@ -454,107 +667,93 @@ def _register_bot_events():
             # this is probably a whisper/private message, dont handle it!
             return
 
-        if ctx.content.startswith("!"):
-            if ctx.content == '!tts start':
-                start_tts()
-            elif ctx.content == '!tts stop':
-                stop_tts()
-            return
-
-        if _stopped:
+        channel = _channels.get(ctx.channel.name)
+        if channel is None:
             return
-
         user = ctx.author.name.lower()
-
-        log.debug(f"echo: {ctx.echo}, {ctx.content}")
-        if ctx.echo:
+        if not admit_message(channel, user, ctx.content, ctx.echo):
             return
 
-        in_text = ctx.content
+        log.debug(f"{user}: {ctx.content}")
+        await _message_pipeline.feed_async(ChatMessage(
+            "twitch",
+            user,
+            ctx.content,
+            emotes=ctx.tags.get("emotes", "") if ctx.tags else "",
+            echo=ctx.echo,
+            reply=ctx.channel.send,
+            channel=channel,
+        ))
 
-        # Skip @mentions (also covers replies, since Twitch prepends @username)
-        if should_ignore_mentions(in_text):
-            return
 
-        if user in _conf.Ignore_Users:
-            log.debug(f"{user} is in _Ignore_Users")
-            return
+def detect_and_translate(user: str, in_text: str, channel):
+    """Detect the language of a cleaned message and translate it if needed.
 
-        for w in _conf.Ignore_Line:
-            if w in in_text:
-                log.debug(f"{w} is in _Ignore_Line")
-                return
-
-        in_text = replace_delete_words(in_text)
-        in_text = replace_links(in_text)
-        in_text = remove_emojis(in_text)
-        in_text = replace_emotes(in_text, ctx)
-        in_text = delete_mention_names(in_text)
-        in_text = " ".join(in_text.split())
+    Does blocking network I/O, so it must not be called on the bot loop.
+    Returns the reactions for `react`, or None if the message is ignored.
+    """
+    log.debug(f"--- Detect Language ---")
+    translated_text = None
+    lang_detect = determine_lang_known(in_text, user, channel)
+    if lang_detect is None:
+        lang_detect, translated_text = determine_lang_detect_chain(
+            in_text, user, channel, combined=can_detect_and_translate(in_text)
+        )
+    log.debug(f"lang_detect: {lang_detect}")
+    log.debug(f"--- Select Destinate Language ---")
+    lang_dest = determine_lang_dest(lang_detect, channel)
+    log.debug(f"lang_dest: {lang_dest}")
 
-        if not in_text:
-            log.debug(f"message is empty after cleanup")
-            return
+    m = in_text.split(":")
+    if len(m) >= 2:
+        if m[0] in _conf.TargetLangs:
+            lang_dest = m[0]
+            in_text = ":".join(m[1:])
+    else:
+        if lang_detect in channel.conf.Ignore_Lang:
+            log.debug(f"lang_detect ({lang_detect}) is ignored, returning...")
+            return None
 
-        log.debug(f"--- Detect Language ---")
-        lang_detect = determine_lang_detect(in_text, user)
-        log.debug(f"lang_detect: {lang_detect}")
-        log.debug(f"--- Select Destinate Language ---")
-        lang_dest = determine_lang_dest(lang_detect)
-        log.debug(f"lang_dest: {lang_dest}")
-
-        m = in_text.split(":")
-        if len(m) >= 2:
-            if m[0] in _conf.TargetLangs:
-                lang_dest = m[0]
-                in_text = ":".join(m[1:])
-        else:
-            if lang_detect in _conf.Ignore_Lang:
-                log.debug(f"lang_detect ({lang_detect}) is ignored, returning...")
-                return
+    log.debug(f"lang_dest: {lang_dest} in_text: {in_text}")
 
-        log.debug(f"lang_dest: {lang_dest} in_text: {in_text}")
+    ret = {
+        "user": user,
+        "reactions": [],
+    }
 
-        ret = {
-            "user": user,
-            "reactions": [],
+    ret["reactions"].append(
+        {
+            "type": "detected",
+            "sound": channel.conf.TTS_IN,
+            "lang": lang_detect,
+            "text": in_text,
         }
+    )
 
-        ret["reactions"].append(
-            {
-                "type": "detected",
-                "sound": _conf.TTS_IN,
-                "lang": lang_detect,
-                "text": in_text,
-            }
-        )
-
-        if lang_detect != lang_dest:
-            log.debug(f"--- Translation ---")
+    if lang_detect != lang_dest:
+        log.debug(f"--- Translation ---")
+        if translated_text is None:
             translated_text = translate_text(in_text, lang_detect, lang_dest)
+        if translated_text:
             ret["reactions"].append(
                 {
                     "type": "translated",
-                    "sound": _conf.TTS_OUT,
+                    "sound": channel.conf.TTS_OUT,
                     "lang": lang_dest,
                     "text": translated_text,
                 }
             )
-            if _conf.Send_Translation_To_Chat:
-                try:
-                    await ctx.channel.send(f"/me [{lang_detect} -> {lang_dest}] {user}: {translated_text}")
-                    log.debug(f"Sent translation to chat: [{lang_detect} -> {lang_dest}] {user}: {translated_text}")
-                except Exception as e:
-                    log.error(f"Failed to send translation to chat: {e}")
+        else:
+            log.debug("no translation available, only reading the original")
 
-        react(ret)
+    return ret
 
 
-def react(ret):
+def react(ret, channel):
     print_infos = []
     for r in ret["reactions"]:
         if r["sound"]:
-            queue_tts(r["text"], r["lang"])
+            queue_tts(channel, r["text"], r["lang"], ret["user"])
         label = f"{r['type']:<11}: {constants.LANGUAGES.get(r['lang'], 'unknown')}"
         print_infos.append((label, r["text"], r["sound"]))
 
@@ -564,63 +763,234 @@ def react(ret):
             longest = len(label)
 
     print()
+    if len(_channels) > 1:
+        print(f"📺 Channel    : {channel.name}")
     print(f"👤 User       : {ret['user']}"),
     for (label, value, sound) in print_infos:
         icon = "🔈" if sound else "🔇"
         print(f"{icon} {label:<{longest}} : {value}")
 
 
-def synth_create_file(file: str, text: str, lang: str):
+def admit_message(channel, user: str, text: str, echo=False):
+    """Fast path run before a message enters the pipeline.
+
+    Handles the !tts commands and rejects commands, echo messages and
+    ignored users without rewriting anything.
+    """
+    reason = channel.admission.check(user, text, echo)
+    if reason == "command":
+        if text == '!tts start':
+            start_tts(channel)
+        elif text == '!tts stop':
+            stop_tts(channel)
+    elif reason is None and channel.stopped:
+        reason = channel.admission.count("stopped")
+    return reason is None
+
+
+def stage_filter(msg: ChatMessage):
+    # Ignore_Line words and @mentions (also covers replies, since Twitch
+    # prepends @username)
+    reason = msg.channel.text_filter.reject(msg.text)
+    if reason is not None:
+        msg.channel.admission.count(reason)
+        return False
+    return True
+
+
+def stage_clean(msg: ChatMessage):
+    # emote positions refer to the message as received, so they go first
+    msg.text = msg.channel.text_filter.clean(strip_emote_ranges(msg.raw, msg.emotes))
+
+    if not msg.text:
+        log.debug(f"message is empty after cleanup")
+        return False
+    return True
+
+
+def stage_detect_and_translate(msg: ChatMessage):
+    msg.result = detect_and_translate(msg.user, msg.text, msg.channel)
+    return msg.result is not None
+
+
+def stage_send_to_chat(msg: ChatMessage):
+    if not msg.channel.conf.Send_Translation_To_Chat or msg.reply is None or _bot_loop is None:
+        return True
+    lang_detect = msg.result["reactions"][0]["lang"]
+    for r in msg.result["reactions"][1:]:
+        if not r["text"]:
+            continue
+        text = f"/me [{lang_detect} -> {r['lang']}] {msg.user}: {r['text']}"
+        asyncio.run_coroutine_threadsafe(send_to_chat(msg.reply, text), _bot_loop)
+    return True
+
+
+async def send_to_chat(reply, text: str):
+    try:
+        await reply(text)
+        log.debug(f"Sent translation to chat: {text}")
+    except Exception as e:
+        log.error(f"Failed to send translation to chat: {e}")
+
+
+def stage_react(msg: ChatMessage):
+    react(msg.result, msg.channel)
+
+
+def create_message_pipeline():
+    """Build the stages every twitch and youtube message passes."""
+    global _message_pipeline
+    if _message_pipeline:
+        _message_pipeline.stop()
+    _message_pipeline = MessagePipeline(
+        workers=_conf.Translate_Workers,
+        max_pending=_conf.Translate_Max_Pending,
+    )
+    _message_pipeline.add_stage("filter", stage_filter, INLINE)
+    _message_pipeline.add_stage("clean", stage_clean, INLINE)
+    _message_pipeline.add_stage("detect_translate", stage_detect_and_translate, BLOCKING)
+    _message_pipeline.add_stage("send_to_chat", stage_send_to_chat, ORDERED)
+    _message_pipeline.add_stage("react", stage_react, ORDERED)
+    _message_pipeline.start()
+    return _message_pipeline
+
+
+def synth_create_audio(text: str, lang: str):
+    """Synthesize an utterance into memory, returns the mp3 data or None."""
     try:
-        log.debug("generating sound file via gTTS")
+        log.debug("generating sound via gTTS")
         tts = gTTS(text, lang=lang)
 
-        tts.save(file)
-        log.debug(f"generated file: {file}")
+        fp = io.BytesIO()
+        tts.write_to_fp(fp)
+        log.debug(f"generated sound: {fp.tell()} bytes")
+        return fp.getvalue()
     except Exception as e:
         print("gTTS error: TTS sound is not generated...")
-        if e.args[0].startswith("Language not supported:"):
+        if e.args and str(e.args[0]).startswith("Language not supported:"):
             # try to speak again with the default language
             if _conf.lang_Default and lang != _conf.lang_Default:
-                queue_tts(text, _conf.lang_Default)
+                return synth_create_audio(text, _conf.lang_Default)
         log.debug(e.args)
+        return None
+
+
+def tts_speed() -> float:
+    """Speed to read the next message at, faster while messages pile up."""
+    if not _tts_pipeline:
+        return 1.0
+    waiting, age = _tts_pipeline.backlog()
+    return playback_speed(
+        waiting,
+        age,
+        min_speed=_conf.TTS_Speed_Min,
+        max_speed=_conf.TTS_Speed_Max,
+        full_waiting=_conf.TTS_Speed_Backlog,
+        full_age=_conf.TTS_Speed_Backlog_Age,
+    )
+
+
+def post_processing_steps():
+    steps = []
+    speed = tts_speed()
+    if speed != 1.0:
+        log.debug(f"reading at {speed:.2f}x speed")
+        steps.append(("stretch", {"speed": speed, "rate": _post_processor.rate}))
+    if _conf.TTS_Normalize:
+        steps.append(("normalize", {"peak": _conf.TTS_Normalize}))
+    return steps
 
 
-def synth_play_file(file: str):
+def synth_decode(audio: bytes, steps):
+    """Decode mp3 audio into a pygame Sound and run the post-processing steps.
+
+    A Sound has a known length, so the end of its playback needs no
+    polling. Falls back to the mp3 audio if decoding fails.
+    """
+    try:
+        # decodes into the format of the mixer
+        decoded = pygame.mixer.Sound(io.BytesIO(audio))
+        if not steps:
+            return decoded
+        with memoryview(decoded) as pcm:
+            return _post_processor.process(
+                pcm, steps, into=lambda buffer: pygame.mixer.Sound(buffer=buffer)
+            )
+    except Exception as e:
+        log.debug(f"decoding or post-processing failed: {e}")
+        return audio
+
+
+def synth_save_file(audio: bytes):
+    """Keep a copy of the audio in the tmp dir (TTS_Debug_Files)."""
+    file = f"{_conf.TMP_DIR}/cnt_{next(_tts_file_counter)}.mp3"
+    try:
+        with open(file, "wb") as f:
+            f.write(audio)
+        log.debug(f"saved sound file: {file}")
+    except Exception as e:
+        print(f"unable to save the file: {file}")
+        log.debug(e)
+        log.debug(e.args)
+
+
+def synth_play_audio(audio):
+    """Start playing mp3 audio or a post-processed Sound, runs on the playback thread."""
     try:
         log.debug("playing sound via pygame")
-        pygame.mixer.music.load(file)
+        if isinstance(audio, pygame.mixer.Sound):
+            audio.play()
+            _playback.started(audio.get_length())
+            return
+        pygame.mixer.music.load(io.BytesIO(audio), "mp3")
         pygame.mixer.music.play()
-        # now wait until the song is over
-        while pygame.mixer.music.get_busy():
-            time.sleep(1)  # wait 1 second
-        pygame.mixer.music.unload()
+        _playback.started()
     except Exception as e:
         print("pygame.mixer.music error: unable to play the sound...")
         log.debug(e)
         log.debug(e.args)
 
 
-def synth_remove_file(file: str):
+def wait_for_playback():
+    """Block until pygame finished playing or `stop_playback` is called."""
+    _playback.wait()
     try:
-        os.remove(file)
+        pygame.mixer.music.unload()
     except Exception as e:
-        print(f"unable to remove the file: {file}")
         log.debug(e)
-        log.debug(e.args)
+
+
+def stop_playback():
+    _playback.interrupt()
+    pygame.mixer.music.stop()
+    pygame.mixer.stop()
 
 
 def synthesize(text: str, lang: str):
-    if _conf.ReadOnlyTheseLang and (lang not in _conf.ReadOnlyTheseLang):
-        log.debug(f"language configured to be not read: {lang}")
-        return
+    """Synthesize an utterance, runs on the synthesis workers."""
+    key = AudioCache.make_key(text, lang, "gtts")
+    audio = _audio_cache.get(key)
+    if audio is not None:
+        log.debug(f"[Audio Cache] hit in lang {lang}: {text}")
+    else:
+        log.debug(f"synthesizing in lang {lang}: {text}")
+        audio = synth_create_audio(text, lang)
+        if not audio:
+            return audio
+        _audio_cache.put(key, audio)
+        if _conf.TTS_Debug_Files:
+            synth_save_file(audio)
+
+    # the cache keeps the mp3, decoded sound is much bigger
+    return synth_decode(audio, post_processing_steps() if _post_processor else [])
 
-    log.debug(f"synthesizing in lang {lang}: {text}")
 
-    tts_file = f"{_conf.TMP_DIR}/cnt_{datetime.now().microsecond}.mp3"
-    synth_create_file(tts_file, text, lang)
-    synth_play_file(tts_file)
-    synth_remove_file(tts_file)
+def print_deepl_usage():
+    try:
+        usage = _deepl_client.usage()
+        print(f"DeepL usage            : {usage.get('character_count')} / {usage.get('character_limit')} characters")
+    except Exception as e:
+        print(f"DeepL usage            : unavailable ({e})")
 
 
 def sig_handler(signum, frame) -> None:
@@ -631,19 +1001,30 @@ def run_bot_core():
     """Core bot functionality without signal handlers - safe for threading"""
     global _bot_loop, bot
     try:
-        reload_config()
+        init()
         print(f"twitch-tts (Version: {version})")
-        print(f"Connect to the channel : {_conf.Twitch_Channel}")
+        print(f"Connect to the channel : {', '.join(_channels.names())}")
         print(f"Translator Username    : {_conf.Trans_Username}")
-        print(f"Translator ENGINE      : {_conf.Translator}")
+        print(f"Translator ENGINE      : {' > '.join(e.name for e in _translation_chain.engines)}")
         print(f"Google Translate       : translate.google.{_conf.url_suffix}")
+        if _conf.Translator == "deepl" and _deepl_client:
+            print(f"DeepL API              : {_deepl_client.api_url}")
+            print_deepl_usage()
+        print(f"Language detection     : {' > '.join(_conf.Detectors)}")
+
+        if _conf.TTS_Debug_Files:
+            log.debug("run, tmp dir...")
+            create_tmp_dir(_conf.TMP_DIR)
 
-        log.debug("run, tmp dir...")
-        create_tmp_dir(_conf.TMP_DIR)
+        log.debug("run, caches...")
+        load_caches()
 
         log.debug("run, tts thread...")
         tts_thread()
 
+        log.debug("run, message pipeline...")
+        create_message_pipeline()
+
         log.debug("run, yt thread...")
         yt_thread()
 
@@ -663,6 +1044,25 @@ def run_bot_core():
         log.debug(e)
         raise  # Re-raise for GUI to handle
     finally:
+        if _message_pipeline:
+            log.debug(f"pipeline: {_message_pipeline.stats()}")
+            log.debug(f"rejected: {_channels.stats()}")
+            _message_pipeline.stop()
+        if _yt_reader:
+            _yt_reader.stop()
+        if _batch_translator:
+            log.debug(f"translation batches: {_batch_translator.stats()}")
+        if _deepl_client:
+            log.debug(f"deepl: {_deepl_client.stats()}")
+        log.debug(f"translation engines: {_translation_chain.stats()}")
+        log.debug(f"google: {_google_guard.stats()}")
+        if _tts_pipeline:
+            log.debug(f"tts: {tts_stats()}")
+            _tts_pipeline.stop()
+        if _post_processor:
+            log.debug(f"post-processing: {_post_processor.stats()}")
+            _post_processor.stop()
+        save_caches()
         _bot_loop = None
         bot = None
 
@@ -687,4 +1087,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # post-processing worker processes of a frozen build start here
+    multiprocessing.freeze_support()
     sys.exit(main())
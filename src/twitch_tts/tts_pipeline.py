@@ -0,0 +1,404 @@
+import logging
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+QUEUE_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+
+@dataclass
+class Utterance:
+    text: str
+    lang: str
+    user: str = ""
+    channel: str = ""
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class TtsQueue:
+    """Bounded queue of utterances waiting to be synthesized.
+
+    When the queue holds `maxsize` utterances (or a user has `per_user`
+    utterances queued), `policy` decides whether the oldest queued
+    utterance or the new one is dropped. Utterances older than `max_age`
+    seconds are dropped instead of being returned by `get`. With `merge`,
+    consecutive utterances of the same user in the same language are
+    joined into one. A value of 0 disables the respective limit.
+    `cond` lets several queues share one condition (see FairQueue).
+    """
+
+    def __init__(self, maxsize=0, policy=DROP_OLDEST, per_user=0, max_age=0, merge=False, clock=time.monotonic, cond=None):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"unknown queue policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.per_user = per_user
+        self.max_age = max_age
+        self.merge = merge
+        self.dropped = Counter()
+        self.merged = 0
+        self._clock = clock
+        self._items = deque()
+        self._closed = False
+        self._cond = cond or threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def configure(self, maxsize=0, policy=DROP_OLDEST, per_user=0, max_age=0, merge=False):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"unknown queue policy: {policy}")
+        with self._cond:
+            self.maxsize = maxsize
+            self.policy = policy
+            self.per_user = per_user
+            self.max_age = max_age
+            self.merge = merge
+
+    def put(self, item: Utterance):
+        with self._cond:
+            if self._closed:
+                return
+            if self.merge and self._items:
+                last = self._items[-1]
+                if last.user and last.user == item.user and last.lang == item.lang:
+                    last.text = f"{last.text} {item.text}"
+                    self.merged += 1
+                    return
+
+            if self.per_user and item.user:
+                queued = [i for i in self._items if i.user == item.user]
+                if len(queued) >= self.per_user:
+                    if self.policy == DROP_NEWEST:
+                        self._drop(item, "per_user")
+                        return
+                    self._items.remove(queued[0])
+                    self._drop(queued[0], "per_user")
+
+            if self.maxsize and len(self._items) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self._drop(item, "full")
+                    return
+                self._drop(self._items.popleft(), "full")
+
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, block=True):
+        """Return the next utterance, or None once the queue is closed.
+
+        Without `block`, None is also returned if the queue is empty.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                item = self._pop()
+                if item is not None or not block:
+                    return item
+                self._cond.wait()
+
+    def wait(self) -> bool:
+        """Block until utterances are queued, False once the queue is closed."""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            return not self._closed
+
+    def clear(self, channel=None):
+        """Remove all queued utterances (of `channel`), returns how many were removed."""
+        with self._cond:
+            count = len(self._items)
+            if channel is None:
+                self._items.clear()
+            else:
+                self._items = deque(i for i in self._items if i.channel != channel)
+                count -= len(self._items)
+            self.dropped["flushed"] += count
+            return count
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def backlog(self):
+        """Number of queued utterances and seconds the oldest one is waiting."""
+        with self._cond:
+            if not self._items:
+                return 0, 0.0
+            return len(self._items), self._clock() - self._items[0].queued_at
+
+    def stats(self):
+        with self._cond:
+            return {
+                "depth": len(self._items),
+                "dropped": dict(self.dropped),
+                "merged": self.merged,
+            }
+
+    def _pop(self):
+        # the next utterance that is not too old, or None. needs the lock
+        while self._items:
+            item = self._items.popleft()
+            if self.max_age and self._clock() - item.queued_at > self.max_age:
+                self._drop(item, "too_old")
+                continue
+            return item
+        return None
+
+    def _drop(self, item: Utterance, reason: str):
+        self.dropped[reason] += 1
+        log.debug(f"dropped tts ({reason}): {item.user}: {item.text}")
+
+
+class FairQueue:
+    """One TtsQueue per channel, served in turn.
+
+    Utterances go to the queue of their channel, so every channel keeps its
+    own limits and a busy channel cannot starve the quiet ones. Has the
+    interface of TtsQueue, for TtsPipeline.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._queues = {}
+        self._order = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def configure(self, channel: str, **settings):
+        """Create or update the queue of a channel, see TtsQueue for `settings`."""
+        with self._cond:
+            if channel in self._queues:
+                self._queues[channel].configure(**settings)
+                return
+            self._queues[channel] = TtsQueue(clock=self._clock, cond=self._cond, **settings)
+            self._order.append(channel)
+
+    def put(self, item: Utterance):
+        with self._cond:
+            tts_queue = self._queues.get(item.channel)
+            if tts_queue is None:
+                log.debug(f"dropped tts (unknown channel {item.channel}): {item.user}: {item.text}")
+                return
+            tts_queue.put(item)
+
+    def get(self, block=True):
+        """Return the next utterance, or None once the queue is closed.
+
+        Without `block`, None is also returned if all queues are empty.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                for _ in range(len(self._order)):
+                    channel = self._order[0]
+                    self._order.rotate(-1)
+                    item = self._queues[channel]._pop()
+                    if item is not None:
+                        return item
+                if not block:
+                    return None
+                self._cond.wait()
+
+    def wait(self) -> bool:
+        """Block until utterances are queued, False once the queue is closed."""
+        with self._cond:
+            while not len(self) and not self._closed:
+                self._cond.wait()
+            return not self._closed
+
+    def clear(self, channel=None):
+        with self._cond:
+            return sum(
+                q.clear() for name, q in self._queues.items() if channel in (None, name)
+            )
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for tts_queue in self._queues.values():
+                tts_queue.close()
+            self._cond.notify_all()
+
+    def backlog(self):
+        with self._cond:
+            backlogs = [q.backlog() for q in self._queues.values()]
+        return sum(depth for depth, _age in backlogs), max((age for _depth, age in backlogs), default=0.0)
+
+    def stats(self):
+        with self._cond:
+            channels = {name: q.stats() for name, q in self._queues.items()}
+        return {
+            "depth": sum(c["depth"] for c in channels.values()),
+            "channels": channels,
+        }
+
+
+class TtsPipeline:
+    """Synthesizes queued utterances while the previous ones are playing.
+
+    `synth_fn(text, lang)` returns the audio of an utterance (or None if
+    nothing should be played) and runs on `workers` threads.
+    `play_fn(audio)` starts playing the audio and `wait_fn()` blocks until
+    it is done, both on a single playback thread. `stop_fn()` stops the
+    playback. Utterances are played in the order they were queued, and at
+    most `prefetch` synthesized utterances wait for playback.
+    """
+
+    def __init__(self, synth_fn, play_fn, wait_fn, stop_fn, workers=2, prefetch=2, tts_queue=None):
+        self.synth_fn = synth_fn
+        self.play_fn = play_fn
+        self.wait_fn = wait_fn
+        self.stop_fn = stop_fn
+        self.workers = max(1, workers)
+        self.queue = tts_queue if tts_queue is not None else TtsQueue()
+        self._ready = queue.Queue(maxsize=max(1, prefetch))
+        self._executor = None
+        self._threads = []
+        # bumped by `flush`, work of older generations is thrown away
+        self._generation = 0
+        self._channel_generations = Counter()
+        self._playing = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._threads:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="tts-synth"
+        )
+        self._threads = [
+            threading.Thread(target=self._dispatch, name="tts-dispatch", daemon=True),
+            threading.Thread(target=self._play, name="tts-play", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stop the pipeline threads, utterances still queued are discarded."""
+        if not self._threads:
+            return
+        self.flush()
+        self.queue.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._threads = []
+
+    def flush(self, channel=None):
+        """Discard all queued and synthesized utterances and stop playback.
+
+        Synthesis requests that already started cannot be interrupted, but
+        their results are dropped. The pipeline keeps running, new
+        utterances are played as usual. With `channel`, only the utterances
+        of that channel are discarded.
+        """
+        if channel is not None:
+            self._flush_channel(channel)
+            return
+        with self._lock:
+            self._generation += 1
+            flushed = self.queue.clear()
+            while True:
+                try:
+                    entry = self._ready.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    # keep the stop request for the playback thread
+                    self._ready.put_nowait(_STOP)
+                    break
+                entry[-1].cancel()
+                flushed += 1
+            self.stop_fn()
+        log.debug(f"flushed {flushed} utterances")
+
+    def _flush_channel(self, channel: str):
+        with self._lock:
+            # synthesized utterances are skipped by the playback thread
+            self._channel_generations[channel] += 1
+            flushed = self.queue.clear(channel)
+            if self._playing == channel:
+                self.stop_fn()
+        log.debug(f"flushed {flushed} utterances of {channel}")
+
+    def put(self, text: str, lang: str, user: str = "", channel: str = ""):
+        self.queue.put(Utterance(text, lang, user, channel))
+
+    def backlog(self):
+        """Utterances waiting to be played and seconds the oldest queued one is waiting."""
+        depth, age = self.queue.backlog()
+        return depth + self._ready.qsize(), age
+
+    def stats(self):
+        stats = self.queue.stats()
+        stats["ready"] = self._ready.qsize()
+        return stats
+
+    def _dispatch(self):
+        while True:
+            # taking an utterance and flush exclude each other, so an
+            # utterance taken before a flush keeps its old generation
+            with self._lock:
+                item = self.queue.get(block=False)
+                if item is not None:
+                    generation = (self._generation, self._channel_generations[item.channel])
+            if item is None:
+                if self.queue.wait():
+                    continue
+                self._ready.put(_STOP)
+                return
+            try:
+                future = self._executor.submit(self.synth_fn, item.text, item.lang)
+            except RuntimeError:
+                # executor was shut down
+                self._ready.put(_STOP)
+                return
+            # blocks while `prefetch` utterances are waiting for playback
+            self._ready.put((generation, item.channel, future))
+
+    def _play(self):
+        while True:
+            entry = self._ready.get()
+            if entry is _STOP:
+                return
+            generation, channel, future = entry
+            if not self._is_current(generation, channel) or future.cancelled():
+                continue
+            try:
+                audio = future.result()
+            except Exception as e:
+                log.debug(f"synthesizing failed: {e}")
+                continue
+            if audio is None:
+                continue
+            try:
+                # starting playback and flush exclude each other, so a flush
+                # either prevents this utterance or stops it
+                with self._lock:
+                    if not self._is_current(generation, channel):
+                        continue
+                    self.play_fn(audio)
+                    self._playing = channel
+                self.wait_fn()
+            except Exception as e:
+                log.debug(f"playback failed: {e}")
+            finally:
+                self._playing = None
+
+    def _is_current(self, generation, channel: str) -> bool:
+        return generation == (self._generation, self._channel_generations[channel])
@@ -1,10 +1,81 @@
+import json
+import logging
+import os
 import re
+import threading
+import time
+from collections import deque
 
-# Replace with your actual API key from Google Cloud Console
+import requests
+from pytchat import ChatDataFinished
 
-def get_live_video_id(youtube, channel_id):
+log = logging.getLogger(__name__)
+
+# quota units of the YouTube Data API requests used here
+SEARCH_COST = 100
+LIST_COST = 1
+
+CHANNEL_ID_REGEX = re.compile(r"^UC[\w-]{22}$")
+CANONICAL_VIDEO_REGEX = re.compile(r'<link rel="canonical" href="https://www\.youtube\.com/watch\?v=([\w-]{11})"')
+LIVE_NOW_MARKER = '"isLiveNow":true'
+
+
+class QuotaMeter:
+    """Counts the API quota units spent, in total and during the last hour."""
+
+    def __init__(self, clock=time.time):
+        self.total = 0
+        self._clock = clock
+        self._spent = deque()
+        self._lock = threading.Lock()
+
+    def spend(self, units: int, what: str = ""):
+        with self._lock:
+            self.total += units
+            self._spent.append((self._clock(), units))
+        log.debug(f"youtube api: {what} costs {units} units, {self.per_hour()} in the last hour")
+
+    def per_hour(self) -> int:
+        with self._lock:
+            hour_ago = self._clock() - 3600
+            while self._spent and self._spent[0][0] < hour_ago:
+                self._spent.popleft()
+            return sum(units for _time, units in self._spent)
+
+
+class ChannelIdCache:
+    """Resolved channel ids by what was configured, stored in a json file."""
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._ids = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    self._ids = json.load(file)
+            except Exception as e:
+                log.debug(f"unable to load channel id cache {path}: {e}")
+
+    def get(self, key: str):
+        return self._ids.get(key)
+
+    def put(self, key: str, channel_id: str):
+        self._ids[key] = channel_id
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self._ids, file)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            log.debug(f"unable to store channel id cache {self.path}: {e}")
+
+
+def get_live_video_id(youtube, channel_id, quota=None):
     """
     Checks if the channel is currently live, and returns the live video ID.
+    Costs 100 quota units, see LiveChecker for a cheaper way.
     """
     response = youtube.search().list(
         part="snippet",
@@ -13,6 +84,8 @@ def get_live_video_id(youtube, channel_id):
         type="video",
         maxResults=1
     ).execute()
+    if quota:
+        quota.spend(SEARCH_COST, "search live video")
 
     items = response.get("items", [])
     if items:
@@ -22,35 +95,205 @@ def get_live_video_id(youtube, channel_id):
     return None
 
 
-def resolve_channel_id(youtube, user_input):
+def _list_channel_id(youtube, quota, **kwargs):
+    # channels().list costs 1 unit, a search costs 100
+    response = youtube.channels().list(part="id", **kwargs).execute()
+    if quota:
+        quota.spend(LIST_COST, "channels list")
+    items = response.get("items", [])
+    return items[0]["id"] if items else None
+
+
+def _search_channel_id(youtube, quota, query):
+    response = youtube.search().list(
+        q=query,
+        type="channel",
+        part="snippet",
+        maxResults=1
+    ).execute()
+    if quota:
+        quota.spend(SEARCH_COST, "search channel")
+    items = response.get("items", [])
+    if items:
+        for item in items:
+            print(f"Found channel: {item['snippet']['title']} (ID: {item['id']['channelId']})")
+        return items[0]["snippet"]["channelId"]
+    return None
+
+
+def resolve_channel_id(youtube, user_input, quota=None, cache=None):
+    """Channel id for a channel id, @handle or channel url.
+
+    Handles and user names are looked up with channels().list, only custom
+    urls need a search. Results are kept in `cache`.
+    """
+    user_input = user_input.strip()
+    if CHANNEL_ID_REGEX.match(user_input):
+        return user_input
+    if cache and cache.get(user_input):
+        return cache.get(user_input)
+
+    channel_id = None
     if user_input.startswith("@"):
-        # Search by handle name
-        query = user_input[1:]
-        response = youtube.search().list(
-            q=query,
-            type="channel",
-            part="snippet",
-            maxResults=1
-        ).execute()
-        items = response.get("items", [])
-        if items:
-            return items[0]["snippet"]["channelId"]
+        channel_id = _list_channel_id(youtube, quota, forHandle=user_input)
     elif "youtube.com" in user_input:
-        match = re.search(r"(?:/channel/|/user/|/c/)?([^/?&]+)", user_input.split("youtube.com/")[-1])
+        path = user_input.split("youtube.com/")[-1]
+        match = re.match(r"(channel/|user/|c/)?([^/?&]+)", path)
         if match:
-            query = match.group(1)
-            # Same as handle search
-            response = youtube.search().list(
-                q=query,
-                type="channel",
-                part="snippet",
-                maxResults=1
-            ).execute()
-            items = response.get("items", [])
-            if items:
-                for item in items:
-                    print(f"Found channel: {item['snippet']['title']} (ID: {item['id']['channelId']})")
-                return items[0]["snippet"]["channelId"]
+            kind, name = match.groups()
+            if kind == "channel/" and CHANNEL_ID_REGEX.match(name):
+                channel_id = name
+            elif name.startswith("@"):
+                channel_id = _list_channel_id(youtube, quota, forHandle=name)
+            elif kind == "user/":
+                channel_id = _list_channel_id(youtube, quota, forUsername=name)
+            else:
+                channel_id = _search_channel_id(youtube, quota, name)
     else:
         return user_input  # Assume it's already a channel ID
-    return None
+
+    if channel_id and cache:
+        cache.put(user_input, channel_id)
+    return channel_id
+
+
+class LiveChecker:
+    """Finds the live video of a channel without spending API quota.
+
+    Fetches the channel's /live page with a conditional GET and looks for a
+    video that is live now. Only if the page cannot be read, the search API
+    (100 units) is used, at most every `search_interval` seconds. Checks
+    while the channel is offline are spaced out from `min_interval` to
+    `max_interval` seconds.
+    """
+
+    def __init__(self, youtube, quota=None, min_interval=30, max_interval=300, search_interval=1800, session=None, clock=time.time):
+        self.youtube = youtube
+        self.quota = quota
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.search_interval = search_interval
+        self.interval = min_interval
+        self.session = session or requests.Session()
+        # skip the cookie consent page
+        self.session.cookies.set("CONSENT", "YES+cb", domain=".youtube.com")
+        self._clock = clock
+        self._etag = None
+        self._last_modified = None
+        self._last_result = None
+        self._last_search = None
+
+    def check(self, channel_id: str):
+        """Return the id of the live video, or None if the channel is offline."""
+        try:
+            video_id = self._check_page(channel_id)
+        except Exception as e:
+            log.debug(f"unable to check live page: {e}")
+            video_id = self._check_search(channel_id)
+
+        if video_id:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 1.5, self.max_interval)
+        return video_id
+
+    def _check_page(self, channel_id: str):
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+        r = self.session.get(
+            f"https://www.youtube.com/channel/{channel_id}/live", headers=headers, timeout=10
+        )
+        if r.status_code == 304:
+            return self._last_result
+        r.raise_for_status()
+        self._etag = r.headers.get("ETag")
+        self._last_modified = r.headers.get("Last-Modified")
+
+        page = r.text
+        if "ytInitialData" not in page and "ytInitialPlayerResponse" not in page:
+            raise ValueError("unexpected page content")
+        match = CANONICAL_VIDEO_REGEX.search(page)
+        # the page of an upcoming stream has a canonical video too
+        self._last_result = match.group(1) if match and LIVE_NOW_MARKER in page else None
+        return self._last_result
+
+    def _check_search(self, channel_id: str):
+        now = self._clock()
+        if self._last_search is not None and now - self._last_search < self.search_interval:
+            return None
+        self._last_search = now
+        return get_live_video_id(self.youtube, channel_id, self.quota)
+
+
+class ChatReader:
+    """Reads the live chat of a video and hands every message to `on_message`.
+
+    Waits the poll interval suggested by the server between fetches
+    (clamped to `min_interval`..`max_interval`), instead of pacing the
+    messages out like pytchat's sync_items. When the connection drops
+    while the stream is still running, the chat is reopened after 1, 2,
+    4, ... seconds, up to `max_reconnects` times in a row.
+    `on_message` must not block, it is called on the reader thread.
+    """
+
+    def __init__(self, create_chat, on_message, min_interval=0.5, max_interval=10.0, max_reconnects=5, max_backoff=30.0):
+        self.create_chat = create_chat
+        self.on_message = on_message
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_reconnects = max_reconnects
+        self.max_backoff = max_backoff
+        self.reconnects = 0
+        self._fetched = False
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep unless stopped, returns False once stopped."""
+        return not self._stopped.wait(seconds)
+
+    def run(self, video_id: str):
+        """Read the chat until the stream ends, reconnects fail or `stop`."""
+        failures = 0
+        while not self._stopped.is_set():
+            self._fetched = False
+            try:
+                chat = self.create_chat(video_id)
+                self._read(chat)
+                chat.raise_for_status()
+                if self._stopped.is_set():
+                    return
+            except ChatDataFinished:
+                log.debug(f"chat of {video_id} finished")
+                return
+            except Exception as e:
+                log.debug(f"chat of {video_id} failed: {e}")
+
+            # a connection that delivered data gets the full reconnect budget
+            failures = 1 if self._fetched else failures + 1
+            if failures > self.max_reconnects:
+                log.debug(f"giving up on chat of {video_id}")
+                return
+            self.reconnects += 1
+            backoff = min(2 ** (failures - 1), self.max_backoff)
+            log.debug(f"reconnecting to chat of {video_id} in {backoff}s")
+            if not self.wait(backoff):
+                return
+
+    def _read(self, chat):
+        while chat.is_alive() and not self._stopped.is_set():
+            data = chat.get()
+            if not chat.is_alive():
+                # pytchat holds the error, see raise_for_status
+                break
+            self._fetched = True
+            for item in getattr(data, "items", None) or []:
+                self.on_message(item)
+            interval = getattr(data, "interval", None) or self.min_interval
+            if not self.wait(min(max(interval, self.min_interval), self.max_interval)):
+                break
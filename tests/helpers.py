@@ -0,0 +1,8 @@
+class FakeClock:
+    """A clock for time.monotonic, advanced by setting `now`."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
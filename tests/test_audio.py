@@ -0,0 +1,156 @@
+import array
+import math
+import threading
+import time
+import unittest
+
+from twitch_tts.audio import Playback, PostProcessor, normalize, playback_speed, stretch
+
+
+def pcm(*samples):
+    return array.array("h", samples).tobytes()
+
+
+def samples(data):
+    return list(array.array("h", data))
+
+
+class NormalizeTests(unittest.TestCase):
+    def test_scales_loudest_sample_to_peak(self):
+        self.assertEqual(list(normalize(array.array("h", [100, -200, 50]), 1, peak=0.5)), [8192, -16384, 4096])
+
+    def test_silence_stays_silent(self):
+        self.assertEqual(list(normalize(array.array("h", [0, 0]), 2)), [0, 0])
+
+
+def tone(frequency, seconds, rate, channels):
+    frames = [round(10000 * math.sin(2 * math.pi * frequency * i / rate)) for i in range(int(seconds * rate))]
+    return array.array("h", [v for v in frames for _ in range(channels)])
+
+
+def frequency_of(samples, rate, channels):
+    mono = list(samples[0::channels])
+    crossings = sum(1 for a, b in zip(mono, mono[1:]) if (a < 0) != (b < 0))
+    return crossings / 2 / (len(mono) / rate)
+
+
+class StretchTests(unittest.TestCase):
+    def test_changes_duration_but_not_pitch(self):
+        for speed in (1.5, 0.8):
+            with self.subTest(speed=speed):
+                result = stretch(tone(220, 1, 8000, 2), 2, speed=speed, rate=8000)
+
+                self.assertAlmostEqual(len(result) / 2 / 8000, 1 / speed, delta=0.01)
+                self.assertAlmostEqual(frequency_of(result, 8000, 2), 220, delta=2)
+
+    def test_normal_speed_keeps_samples(self):
+        samples = tone(220, 0.1, 8000, 1)
+        self.assertIs(stretch(samples, 1, speed=1.0, rate=8000), samples)
+
+
+class PlaybackSpeedTests(unittest.TestCase):
+    def test_speeds_up_with_waiting_messages_or_age(self):
+        def speed(waiting, age):
+            return playback_speed(waiting, age, min_speed=1.0, max_speed=1.5, full_waiting=10, full_age=30)
+
+        self.assertEqual(speed(0, 0), 1.0)
+        self.assertEqual(speed(4, 3), 1.2)
+        self.assertEqual(speed(1, 15), 1.25)
+        self.assertEqual(speed(50, 0), 1.5)
+
+    def test_limits_of_zero_are_ignored(self):
+        self.assertEqual(playback_speed(100, 100, 1.0, 2.0), 1.0)
+
+
+class PlaybackTests(unittest.TestCase):
+    def test_waits_for_length_of_sound(self):
+        busy_checks = []
+        playback = Playback(lambda: busy_checks.append(time.monotonic()) and False)
+        playback.started(0.05)
+        start = time.monotonic()
+
+        self.assertTrue(playback.wait())
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+        # the mixer is only asked once the sound should have ended
+        self.assertEqual(len(busy_checks), 1)
+
+    def test_waits_while_mixer_lags_behind(self):
+        busy = iter([True, True, False])
+        playback = Playback(lambda: next(busy), poll_interval=0.001)
+        playback.started(0.0)
+        self.assertTrue(playback.wait())
+
+    def test_polls_sound_of_unknown_length(self):
+        busy = iter([True, True, True, False])
+        playback = Playback(lambda: next(busy), poll_interval=0.001)
+        playback.started()
+        self.assertTrue(playback.wait())
+
+    def test_interrupt_ends_wait_right_away(self):
+        playback = Playback(lambda: True)
+        playback.started(10)
+        threading.Timer(0.05, playback.interrupt).start()
+        start = time.monotonic()
+
+        self.assertFalse(playback.wait())
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_next_sound_is_not_interrupted(self):
+        playback = Playback(lambda: False)
+        playback.started(10)
+        playback.interrupt()
+        self.assertFalse(playback.wait())
+
+        playback.started(0.0)
+        self.assertTrue(playback.wait())
+
+
+class PostProcessorTests(unittest.TestCase):
+    STEPS = [("normalize", {"peak": 0.5})]
+
+    def test_processes_in_this_process(self):
+        processor = PostProcessor()
+        self.assertEqual(samples(processor.process(pcm(100, -200, 50, 0), self.STEPS)), [8192, -16384, 4096, 0])
+        self.assertEqual(processor.stats()["calls"], 1)
+
+    def test_processes_in_worker_processes(self):
+        processor = PostProcessor(processes=1)
+        processor.start()
+        try:
+            result = processor.process(pcm(100, -200, 50, 0) * 1000, self.STEPS)
+        finally:
+            processor.stop()
+
+        self.assertEqual(samples(result)[:4], [8192, -16384, 4096, 0])
+        self.assertEqual(len(result), 8000)
+
+    def test_hands_result_buffer_to_into(self):
+        processor = PostProcessor(processes=1)
+        processor.start()
+        try:
+            data = memoryview(array.array("h", [100, -200, 50, 0] * 1000))
+            result = processor.process(data, self.STEPS, into=bytearray)
+        finally:
+            processor.stop()
+
+        self.assertIsInstance(result, bytearray)
+        self.assertEqual(samples(result)[:4], [8192, -16384, 4096, 0])
+
+    def test_slowing_down_fits_in_shared_memory(self):
+        processor = PostProcessor(processes=1, channels=1, rate=8000)
+        processor.start()
+        try:
+            result = processor.process(tone(220, 0.5, 8000, 1).tobytes(), [("stretch", {"speed": 0.5, "rate": 8000})])
+        finally:
+            processor.stop()
+
+        # twice as long, less than a window lost at the end
+        self.assertTrue(15500 < len(result) <= 16000, len(result))
+
+    def test_without_steps_audio_is_unchanged(self):
+        data = pcm(1, 2, 3)
+        self.assertIs(PostProcessor().process(data, []), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
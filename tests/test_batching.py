@@ -0,0 +1,117 @@
+import threading
+import time
+import unittest
+
+from twitch_tts.batching import BatchTranslator
+
+
+class Backend:
+    def __init__(self, fail=False, hold=None):
+        self.calls = []
+        self.fail = fail
+        # the first call waits for this event
+        self.hold = hold
+        self.started = threading.Event()
+
+    def __call__(self, texts, lang_tgt):
+        self.calls.append((list(texts), lang_tgt))
+        if self.hold is not None and len(self.calls) == 1:
+            self.started.set()
+            self.hold.wait(5)
+        if self.fail:
+            raise RuntimeError("boom")
+        return [f"{lang_tgt}:{text}" for text in texts]
+
+
+def translate_concurrently(batcher, requests):
+    results = [None] * len(requests)
+    errors = [None] * len(requests)
+
+    def run(i, text, lang):
+        try:
+            results[i] = batcher.translate(text, lang)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [
+        threading.Thread(target=run, args=(i, text, lang))
+        for i, (text, lang) in enumerate(requests)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+class BatchTranslatorTests(unittest.TestCase):
+    def start_first_batch(self, batcher, backend):
+        """Translate "first" on a thread, its batch is underway until `backend.hold` is set."""
+        thread = threading.Thread(target=batcher.translate, args=("first", "ja"))
+        thread.start()
+        self.assertTrue(backend.started.wait(1))
+        return thread
+
+    def test_single_request_is_sent_right_away(self):
+        backend = Backend()
+        batcher = BatchTranslator(backend, window=5)
+
+        start = time.monotonic()
+        self.assertEqual(batcher.translate("hi", "ja"), "ja:hi")
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(backend.calls, [(["hi"], "ja")])
+
+    def test_collects_texts_while_a_batch_is_underway(self):
+        backend = Backend(hold=threading.Event())
+        batcher = BatchTranslator(backend, window=5, max_items=3)
+        first = self.start_first_batch(batcher, backend)
+
+        results, _errors = translate_concurrently(batcher, [("a", "ja"), ("b", "ja"), ("c", "ja")])
+        backend.hold.set()
+        first.join(1)
+
+        self.assertEqual(results, ["ja:a", "ja:b", "ja:c"])
+        self.assertEqual(len(backend.calls), 2)
+        self.assertEqual(sorted(backend.calls[1][0]), ["a", "b", "c"])
+        self.assertEqual(batcher.stats()["avg_size"], 2)
+
+    def test_batches_are_cut_at_max_items(self):
+        backend = Backend(hold=threading.Event())
+        batcher = BatchTranslator(backend, window=0.2, max_items=2)
+        first = self.start_first_batch(batcher, backend)
+
+        texts = ["a", "b", "c", "d", "e"]
+        results, _errors = translate_concurrently(batcher, [(text, "ja") for text in texts])
+        backend.hold.set()
+        first.join(1)
+
+        self.assertEqual(results, [f"ja:{text}" for text in texts])
+        self.assertTrue(all(len(batch) <= 2 for batch, _lang in backend.calls))
+        self.assertEqual(sorted(text for batch, _lang in backend.calls[1:] for text in batch), texts)
+
+    def test_batches_by_target_language(self):
+        backend = Backend()
+        batcher = BatchTranslator(backend, window=0.05, max_items=10)
+
+        results, _errors = translate_concurrently(batcher, [("a", "ja"), ("b", "en"), ("c", "ja")])
+
+        self.assertEqual(results, ["ja:a", "en:b", "ja:c"])
+        langs = {"a": "ja", "b": "en", "c": "ja"}
+        for batch, lang in backend.calls:
+            self.assertTrue(all(langs[text] == lang for text in batch))
+
+    def test_errors_reach_every_caller(self):
+        backend = Backend(fail=True, hold=threading.Event())
+        batcher = BatchTranslator(backend, window=5, max_items=2)
+        first = self.start_first_batch(batcher, backend)
+
+        results, errors = translate_concurrently(batcher, [("a", "ja"), ("b", "ja")])
+        backend.hold.set()
+        first.join(1)
+
+        self.assertEqual(results, [None, None])
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in errors))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from twitch_tts.cache import AudioCache, TTLCache
+from helpers import FakeClock
+
+
+class TTLCacheTests(unittest.TestCase):
+    def test_returns_cached_value_and_counts_hits(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.put(("lol", "en", "ja", "google"), "笑")
+
+        self.assertEqual(cache.get(("lol", "en", "ja", "google")), "笑")
+        self.assertIsNone(cache.get(("gg", "en", "ja", "google")))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.put(("a",), 1)
+        cache.put(("b",), 2)
+        cache.get(("a",))
+        cache.put(("c",), 3)
+
+        self.assertEqual(cache.get(("a",)), 1)
+        self.assertIsNone(cache.get(("b",)))
+        self.assertEqual(cache.get(("c",)), 3)
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+        cache.put(("a",), 1)
+
+        clock.now += 4
+        self.assertEqual(cache.get(("a",)), 1)
+        clock.now += 2
+        self.assertIsNone(cache.get(("a",)))
+        self.assertEqual(len(cache), 0)
+
+    def test_save_and_load_round_trip_skips_expired(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+        cache.put(("old",), "x")
+        clock.now += 3
+        cache.put(("new",), "y")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.json")
+            cache.save(path)
+
+            clock.now += 3
+            loaded = TTLCache(maxsize=10, ttl=5, clock=clock)
+            loaded.load(path)
+
+        self.assertIsNone(loaded.get(("old",)))
+        self.assertEqual(loaded.get(("new",)), "y")
+
+    def test_load_ignores_missing_file(self):
+        cache = TTLCache()
+        cache.load("/does/not/exist.json")
+        self.assertEqual(len(cache), 0)
+
+
+class AudioCacheTests(unittest.TestCase):
+    def test_keys_depend_on_all_parts(self):
+        key = AudioCache.make_key("gg", "en", "gtts")
+        self.assertEqual(key, AudioCache.make_key("gg", "en", "gtts"))
+        self.assertNotEqual(key, AudioCache.make_key("gg", "de", "gtts"))
+
+    def test_evicts_least_recently_used_entries_over_byte_budget(self):
+        cache = AudioCache(max_bytes=10)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        cache.get("a")
+        cache.put("c", b"cccc")
+
+        self.assertEqual(cache.get("a"), b"aaaa")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), b"cccc")
+        self.assertEqual(cache.stats()["bytes"], 8)
+
+    def test_ignores_audio_larger_than_budget(self):
+        cache = AudioCache(max_bytes=3)
+        cache.put("a", b"aaaa")
+        self.assertEqual(len(cache), 0)
+
+    def test_persists_entries_in_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = AudioCache(max_bytes=10, directory=tmp)
+            cache.put("a", b"aaaa")
+            cache.put("b", b"bbbb")
+            cache.put("c", b"cccc")
+            self.assertEqual(sorted(os.listdir(tmp)), ["b.mp3", "c.mp3"])
+
+            loaded = AudioCache(max_bytes=10, directory=tmp)
+            loaded.load()
+
+            self.assertEqual(loaded.get("b"), b"bbbb")
+            self.assertEqual(loaded.get("c"), b"cccc")
+
+    def test_configure_evicts_when_shrunk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = AudioCache(max_bytes=10, directory=tmp)
+            cache.put("a", b"aaaa")
+            cache.put("b", b"bbbb")
+
+            cache.configure(max_bytes=5, directory=tmp)
+
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(cache.get("b"), b"bbbb")
+            self.assertEqual(os.listdir(tmp), ["b.mp3"])
+
+    def test_concurrent_puts_keep_files_in_sync(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = AudioCache(max_bytes=40, directory=tmp)
+            threads = [
+                threading.Thread(target=lambda n=n: [cache.put(f"{n}-{i}", b"x" * 10) for i in range(50)])
+                for n in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(sorted(os.listdir(tmp)), sorted(f"{key}.mp3" for key in cache._data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import unittest
+
+import commentjson
+
+from twitch_tts import conf
+from twitch_tts.channels import ChannelRegistry
+
+EXAMPLE_CONFIG = os.path.join(os.path.dirname(__file__), "..", "config_example.jsonc")
+
+
+def example_config(**overrides):
+    with open(EXAMPLE_CONFIG, encoding="utf-8") as file:
+        config = commentjson.load(file)
+    config.update(overrides)
+    return config
+
+
+class ChannelConfTests(unittest.TestCase):
+    def test_channels_override_top_level_settings(self):
+        main = conf.parse_config(example_config(
+            Twitch_Channel="Main",
+            lang_TransToHome="uk",
+            Channels=[
+                "#Other",
+                {"Twitch_Channel": "third", "lang_TransToHome": "en", "Ignore_Users": ["Bob"]},
+                "main",
+            ],
+        ))
+
+        confs = conf.channel_confs(main)
+
+        self.assertEqual([c.Twitch_Channel for c in confs], ["main", "other", "third"])
+        self.assertEqual([c.lang_TransToHome for c in confs], ["uk", "uk", "en"])
+        self.assertEqual(confs[2].Ignore_Users, ["bob"])
+        self.assertEqual(confs[1].Channels, [])
+
+
+class ChannelRegistryTests(unittest.TestCase):
+    def confs(self, *channels, **overrides):
+        config = example_config(Twitch_Channel=channels[0], Channels=list(channels[1:]), **overrides)
+        return conf.channel_confs(conf.parse_config(config))
+
+    def test_channels_have_their_own_filters(self):
+        channels = ChannelRegistry()
+        channels.update(self.confs("main", {"Twitch_Channel": "other", "Ignore_Users": ["alice"]}))
+
+        self.assertIsNone(channels.get("main").admission.check("alice", "hi", False))
+        self.assertEqual(channels.get("#Other").admission.check("alice", "hi", False), "ignored_user")
+        self.assertEqual(channels.default.name, "main")
+
+    def test_update_keeps_state_of_remaining_channels(self):
+        channels = ChannelRegistry()
+        channels.update(self.confs("main", "other"))
+        channels.get("other").stopped = True
+
+        channels.update(self.confs("other", "new", lang_TransToHome="de"))
+
+        self.assertEqual(channels.names(), ["other", "new"])
+        self.assertTrue(channels.get("other").stopped)
+        self.assertEqual(channels.get("other").conf.lang_TransToHome, "de")
+        self.assertIsNone(channels.get("main"))
+
+
+if __name__ == "__main__":
+    unittest.main()
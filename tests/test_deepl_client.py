@@ -0,0 +1,96 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from twitch_tts.deepl_client import (
+    FREE_API_URL,
+    PRO_API_URL,
+    DeepLClient,
+    deepl_quota_exceeded,
+    default_api_url,
+)
+
+
+class StubDeepL(BaseHTTPRequestHandler):
+    """Answers like the DeepL API, translating by upper-casing the text."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.headers["Authorization"], body))
+        if self.server.quota_exceeded:
+            self._send(456, {"message": "Quota exceeded"})
+            return
+        self._send(200, {"translations": [
+            {"detected_source_language": "EN", "text": text.upper()}
+            for text in body["text"]
+        ]})
+
+    def do_GET(self):
+        self._send(200, {"character_count": 120, "character_limit": 500000})
+
+    def _send(self, status, data):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class DeepLClientTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubDeepL)
+        self.server.requests = []
+        self.server.quota_exceeded = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = DeepLClient("secret:fx", api_url=url, retries=0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_translates_with_auth_header(self):
+        self.assertEqual(self.client.translate("hello", "DE", "EN"), "HELLO")
+
+        auth, body = self.server.requests[0]
+        self.assertEqual(auth, "DeepL-Auth-Key secret:fx")
+        self.assertEqual(body, {"text": ["hello"], "target_lang": "DE", "source_lang": "EN"})
+
+    def test_sends_at_most_50_texts_per_request(self):
+        texts = [f"t{i}" for i in range(120)]
+
+        results = self.client.translate_batch(texts, "DE")
+
+        self.assertEqual(results, [t.upper() for t in texts])
+        self.assertEqual([len(body["text"]) for _auth, body in self.server.requests], [50, 50, 20])
+        self.assertEqual(self.client.stats()["requests"], 3)
+
+    def test_tracks_usage(self):
+        self.client.translate_batch(["ab", "cde"], "DE")
+        self.client.usage()
+
+        stats = self.client.stats()
+        self.assertEqual(stats["characters"], 5)
+        self.assertEqual(stats["character_count"], 120)
+        self.assertEqual(stats["character_limit"], 500000)
+
+    def test_raises_on_exceeded_quota(self):
+        self.server.quota_exceeded = True
+        with self.assertRaises(deepl_quota_exceeded):
+            self.client.translate("hello", "DE")
+
+
+class DefaultApiUrlTests(unittest.TestCase):
+    def test_picks_api_by_key(self):
+        self.assertEqual(default_api_url("abc:fx"), FREE_API_URL)
+        self.assertEqual(default_api_url("abc"), PRO_API_URL)
+
+
+if __name__ == "__main__":
+    unittest.main()
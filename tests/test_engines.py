@@ -0,0 +1,104 @@
+import threading
+import time
+import unittest
+
+from twitch_tts.engines import EngineRegistry, TranslationEngine
+
+
+class FakeEngine:
+    def __init__(self, result="", delay=0.0, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self, text, lang_src, lang_dest):
+        self.calls += 1
+        if self.delay:
+            self.release.wait(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class TranslationChainTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = EngineRegistry()
+        self.chains = []
+
+    def tearDown(self):
+        for chain in self.chains:
+            chain.close()
+
+    def engine(self, name, fn, supports=None, timeout=1.0):
+        self.registry.register(TranslationEngine(name, fn, supports, timeout=timeout))
+        return fn
+
+    def chain(self, names, hedge_after=0.0):
+        chain = self.registry.chain(names, hedge_after=hedge_after)
+        self.chains.append(chain)
+        return chain
+
+    def test_uses_first_engine_that_answers(self):
+        primary = self.engine("primary", FakeEngine("hallo"))
+        fallback = self.engine("fallback", FakeEngine("servus"))
+
+        result = self.chain(["primary", "fallback"]).translate("hello", "en", "de")
+
+        self.assertEqual(result, ("hallo", "primary"))
+        self.assertEqual(fallback.calls, 0)
+
+    def test_falls_back_on_errors_and_empty_answers(self):
+        self.engine("broken", FakeEngine(error=RuntimeError("429")))
+        self.engine("empty", FakeEngine(""))
+        self.engine("google", FakeEngine("hallo"))
+
+        chain = self.chain(["broken", "empty", "google"])
+
+        self.assertEqual(chain.translate("hello", "en", "de"), ("hallo", "google"))
+        self.assertEqual(chain.stats()["broken"]["failures"], 1)
+        self.assertEqual(chain.stats()["empty"]["failures"], 1)
+
+    def test_skips_engines_that_do_not_support_the_languages(self):
+        deepl = self.engine("deepl", FakeEngine("x"), supports=lambda src, dest: dest == "de")
+        self.engine("google", FakeEngine("สวัสดี"))
+
+        result = self.chain(["deepl", "google"]).translate("hello", "en", "th")
+
+        self.assertEqual(result, ("สวัสดี", "google"))
+        self.assertEqual(deepl.calls, 0)
+
+    def test_falls_back_after_timeout(self):
+        slow = self.engine("slow", FakeEngine("late", delay=5), timeout=0.05)
+        self.engine("google", FakeEngine("hallo"))
+
+        start = time.monotonic()
+        chain = self.chain(["slow", "google"])
+        result = chain.translate("hello", "en", "de")
+        slow.release.set()
+
+        self.assertEqual(result, ("hallo", "google"))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(chain.stats()["slow"]["timeouts"], 1)
+
+    def test_hedged_request_takes_first_answer(self):
+        slow = self.engine("slow", FakeEngine("late", delay=5), timeout=10)
+        fast = self.engine("fast", FakeEngine("hallo"))
+
+        start = time.monotonic()
+        result = self.chain(["slow", "fast"], hedge_after=0.05).translate("hello", "en", "de")
+        slow.release.set()
+
+        self.assertEqual(result, ("hallo", "fast"))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(fast.calls, 1)
+
+    def test_returns_empty_when_all_engines_fail(self):
+        self.engine("broken", FakeEngine(error=RuntimeError("boom")))
+
+        self.assertEqual(self.chain(["broken", "unknown"]).translate("hi", "en", "de"), ("", None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import unittest
+
+from twitch_tts.filters import AdmissionFilter, TextFilter, load_emote_names, strip_emote_ranges
+
+
+class AdmissionFilterTests(unittest.TestCase):
+    def test_rejects_commands_echo_and_ignored_users(self):
+        f = AdmissionFilter(ignore_users=["Nightbot", "streamelements"])
+        self.assertEqual(f.check("bob", "!tts stop"), "command")
+        self.assertEqual(f.check("bob", "hi", echo=True), "echo")
+        self.assertEqual(f.check("nightbot", "hi"), "ignored_user")
+        self.assertIsNone(f.check("bob", "hi"))
+
+    def test_counts_reject_reasons(self):
+        f = AdmissionFilter(ignore_users=["nightbot"])
+        f.check("bob", "!drop")
+        f.check("nightbot", "hi")
+        f.check("nightbot", "hi")
+        f.check("bob", "hi")
+        f.count("mention")
+
+        self.assertEqual(f.stats(), {"command": 1, "ignored_user": 2, "mention": 1})
+
+
+class TextFilterRejectTests(unittest.TestCase):
+    def test_rejects_ignore_line_words(self):
+        f = TextFilter(ignore_line=["spam", "!drop"])
+        self.assertEqual(f.reject("buy spam now"), "ignore_line")
+        self.assertEqual(f.reject("type !drop"), "ignore_line")
+        self.assertIsNone(f.reject("hello"))
+
+    def test_ignores_empty_ignore_line_entries(self):
+        f = TextFilter(ignore_line=["", "spam"])
+        self.assertIsNone(f.reject("hello"))
+
+    def test_rejects_mentions_except_the_channel(self):
+        f = TextFilter(ignore_mentions=True, allowed_mention="MyChannel")
+        self.assertEqual(f.reject("@bob hi"), "mention")
+        self.assertEqual(f.reject("@mychannel hi @bob"), "mention")
+        self.assertIsNone(f.reject("@mychannel hi"))
+        self.assertIsNone(f.reject("mail me at bob @ home"))
+
+    def test_finds_ignore_line_word_inside_mention(self):
+        f = TextFilter(ignore_line=["spam"], ignore_mentions=True, allowed_mention="spammer")
+        self.assertEqual(f.reject("@spammer hi"), "ignore_line")
+
+    def test_accepts_everything_without_rules(self):
+        self.assertIsNone(TextFilter().reject("@bob spam"))
+
+
+class TextFilterCleanTests(unittest.TestCase):
+    def test_deletes_words_and_collapses_whitespace(self):
+        f = TextFilter(delete_words=["w", "www"])
+        self.assertEqual(f.clean("  lol www  gg w "), "lol gg")
+
+    def test_replaces_links(self):
+        f = TextFilter(ignore_links=True, link_replacement="link", delete_words=["xx"])
+        self.assertEqual(f.clean("see https://example.com/a xx"), "see link")
+        f = TextFilter(ignore_links=True)
+        self.assertEqual(f.clean("see https://example.com/a now"), "see now")
+
+    def test_removes_emojis_and_mention_names(self):
+        f = TextFilter(ignore_emojis=True, delete_mention_names=True)
+        self.assertEqual(f.clean("@bob nice 😀🎉 play"), "nice play")
+
+    def test_keeps_text_without_rules(self):
+        f = TextFilter()
+        self.assertEqual(f.clean("@bob 😀 https://x.y"), "@bob 😀 https://x.y")
+
+
+    def test_removes_third_party_emote_tokens(self):
+        f = TextFilter(emotes={"KEKW", "catJAM"})
+        self.assertEqual(f.clean("KEKW that was catJAM great KEKWait"), "that was great KEKWait")
+
+
+class EmoteTests(unittest.TestCase):
+    def test_strips_emote_ranges(self):
+        text = "Kappa hi Kappa PogChamp !"
+        self.assertEqual(strip_emote_ranges(text, "25:0-4,9-13/88:15-22"), " hi   !")
+
+    def test_uses_positions_not_text(self):
+        # the same word typed without being an emote stays
+        self.assertEqual(strip_emote_ranges("Kappa Kappa", "25:6-10"), "Kappa ")
+
+    def test_ignores_empty_and_broken_tags(self):
+        self.assertEqual(strip_emote_ranges("hi", ""), "hi")
+        self.assertEqual(strip_emote_ranges("hi there", "25:x-1,3-7"), "hi ")
+
+    def test_loads_names_from_emote_lists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "emotes.json")
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(["KEKW", {"code": "catJAM"}, {"name": "peepoHappy"}, {}], file)
+
+            self.assertEqual(load_emote_names(path), {"KEKW", "catJAM", "peepoHappy"})
+        self.assertEqual(load_emote_names(""), frozenset())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import json
+import unittest
+from urllib.parse import unquote
+
+import requests
+
+from twitch_tts.google_translate import google_translate_error, google_translator
+
+
+def payload(translation, detected="ru"):
+    """A MkEWBc payload as sent by the translate web api."""
+    return [
+        [None, None, detected],
+        [[[None, None, None, True, None, [[translation, None, None, None]]]], "uk", 1, detected],
+    ]
+
+
+def entry(rpc_id, data):
+    return ["wrb.fr", "MkEWBc", None if data is None else json.dumps(data), None, None, None, rpc_id]
+
+
+def body(entries):
+    chunk = json.dumps(entries + [["di", 42], ["af.httprm", 41, "123", 1]])
+    return f")]}}'\n\n{len(chunk)}\n{chunk}\n25\n[[\"e\",4,null,null,130]]\n".encode("utf-8")
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+        self.reason = "OK"
+
+    def iter_lines(self, chunk_size=512):
+        return iter(self.content.splitlines())
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}")
+
+
+class FakeSession(requests.Session):
+    """Answers every rpc with `answer(text)`, in reverse order if asked to."""
+
+    def __init__(self, answer, reverse=False):
+        super().__init__()
+        self.answer = answer
+        self.reverse = reverse
+        self.rpcs = []
+
+    def send(self, request, **kwargs):
+        freq = unquote(request.body[len("f.req="):].rstrip("&"))
+        rpcs = json.loads(freq)[0]
+        self.rpcs.append(rpcs)
+        entries = [entry(rpc_id, self.answer(json.loads(param)[0][0])) for _magic, param, _none, rpc_id in rpcs]
+        if self.reverse:
+            entries.reverse()
+        return FakeResponse(body(entries))
+
+
+def translator(answer, reverse=False):
+    t = google_translator(url_suffix="com")
+    t.session = FakeSession(answer, reverse)
+    return t
+
+
+class SendRpcsTests(unittest.TestCase):
+    def test_numbers_rpcs_and_matches_payloads_by_id(self):
+        t = translator(lambda text: payload(text.upper()))
+
+        payloads = t._send_rpcs(t._package_rpcs([("a", "auto", "uk"), ("b", "auto", "uk"), ("c", "auto", "uk")]))
+
+        self.assertEqual([rpc[-1] for rpc in t.session.rpcs[0]], ["1", "2", "3"])
+        self.assertEqual({k: t._parse_translation(v) for k, v in payloads.items()}, {"1": "A ", "2": "B ", "3": "C "})
+
+    def test_failed_rpc_has_no_payload(self):
+        t = translator(lambda text: None if text == "b" else payload(text))
+
+        payloads = t._send_rpcs(t._package_rpcs([("a", "auto", "uk"), ("b", "auto", "uk")]))
+
+        self.assertIsNone(payloads["2"])
+        self.assertIsNotNone(payloads["1"])
+
+    def test_single_failed_rpc_raises(self):
+        t = translator(lambda text: None)
+
+        with self.assertRaises(google_translate_error):
+            t.translate("a", "uk")
+
+
+class TranslateBatchTests(unittest.TestCase):
+    def test_translates_all_texts_in_one_request(self):
+        t = translator(lambda text: payload(f"uk:{text}"))
+
+        self.assertEqual(t.translate_batch(["a", "b", "c"], "uk"), ["uk:a ", "uk:b ", "uk:c "])
+        self.assertEqual(len(t.session.rpcs), 1)
+
+    def test_out_of_order_results(self):
+        t = translator(lambda text: payload(f"uk:{text}"), reverse=True)
+
+        self.assertEqual(t.translate_batch(["a", "b", "c"], "uk"), ["uk:a ", "uk:b ", "uk:c "])
+
+    def test_failed_rpc_is_none(self):
+        t = translator(lambda text: None if text == "b" else payload(f"uk:{text}"))
+
+        self.assertEqual(t.translate_batch(["a", "b", "c"], "uk"), ["uk:a ", None, "uk:c "])
+
+    def test_skips_empty_and_too_long_texts(self):
+        t = translator(lambda text: payload(f"uk:{text}"))
+
+        self.assertEqual(t.translate_batch(["", "a", "x" * 5000], "uk"), ["", "uk:a ", None])
+        self.assertEqual([rpc[-1] for rpc in t.session.rpcs[0]], ["generic"])
+
+
+class DetectAndTranslateTests(unittest.TestCase):
+    def test_reads_translation_and_detected_language(self):
+        t = translator(lambda text: payload("hello world", detected="ru"))
+
+        self.assertEqual(t.detect_and_translate("привет мир", "en"), ["hello world ", ["ru", "russian"]])
+        self.assertEqual(json.loads(t.session.rpcs[0][0][1])[0][1:3], ["auto", "en"])
+
+    def test_empty_text(self):
+        t = translator(lambda text: payload(text))
+
+        self.assertEqual(t.detect_and_translate("", "en"), ["", ""])
+        self.assertEqual(t.session.rpcs, [])
+
+    def test_too_long_text(self):
+        t = translator(lambda text: payload(text))
+
+        self.assertIsNone(t.detect_and_translate("x" * 5000, "en"))
+        self.assertEqual(t.session.rpcs, [])
+
+    def test_failed_rpc_raises(self):
+        t = translator(lambda text: None)
+
+        with self.assertRaises(google_translate_error):
+            t.detect_and_translate("привет мир", "en")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+
+from twitch_tts.langdetect import WORDS_MAX_CONFIDENCE, OfflineDetector, UserLangMemo, normalize_text
+from helpers import FakeClock
+
+
+class NormalizeTextTests(unittest.TestCase):
+    def test_casefolds_and_collapses_whitespace(self):
+        self.assertEqual(normalize_text("  Hello   WORLD "), "hello world")
+
+
+class UserLangMemoTests(unittest.TestCase):
+    def test_remembers_language_after_threshold(self):
+        memo = UserLangMemo(threshold=2, reverify_every=0)
+        memo.record("bob", "ja")
+        self.assertIsNone(memo.get("bob"))
+
+        memo.record("bob", "ja")
+        self.assertEqual(memo.get("bob"), "ja")
+
+    def test_different_language_resets_streak(self):
+        memo = UserLangMemo(threshold=2, reverify_every=0)
+        memo.record("bob", "ja")
+        memo.record("bob", "ja")
+        memo.record("bob", "en")
+
+        self.assertIsNone(memo.get("bob"))
+
+    def test_reverifies_periodically(self):
+        memo = UserLangMemo(threshold=1, reverify_every=3)
+        memo.record("bob", "ja")
+
+        results = [memo.get("bob") for _ in range(6)]
+
+        self.assertEqual(results, ["ja", "ja", None, "ja", "ja", None])
+
+    def test_memo_decays_after_ttl(self):
+        clock = FakeClock()
+        memo = UserLangMemo(threshold=1, reverify_every=0, ttl=10, clock=clock)
+        memo.record("bob", "ja")
+
+        clock.now = 11
+        self.assertIsNone(memo.get("bob"))
+
+    def test_disabled_with_zero_threshold(self):
+        memo = UserLangMemo(threshold=0)
+        memo.record("bob", "ja")
+        self.assertIsNone(memo.get("bob"))
+
+
+class OfflineDetectorTests(unittest.TestCase):
+    def setUp(self):
+        self.detector = OfflineDetector()
+
+    def assertDetects(self, text, lang, min_confidence=0.8):
+        detected, confidence = self.detector.detect(text)
+        self.assertEqual(detected, lang)
+        self.assertGreaterEqual(confidence, min_confidence)
+
+    def test_detects_languages_by_script(self):
+        self.assertDetects("こんにちは", "ja")
+        self.assertDetects("ありがとう good game", "ja")
+        self.assertDetects("안녕하세요", "ko")
+        self.assertDetects("สวัสดี", "th")
+        self.assertDetects("Привіт, як справи", "uk")
+        self.assertDetects("Привет как дела", "ru")
+
+    def test_distinguishes_simplified_and_traditional_chinese(self):
+        self.assertDetects("你好吗", "zh-CN")
+        self.assertDetects("這個", "zh-TW")
+
+    def test_guesses_latin_languages_by_common_words(self):
+        for text, lang in [
+            ("Hello how are you doing today", "en"),
+            ("Ich habe keine Ahnung was das ist", "de"),
+            ("Ciao, come stai?", "it"),
+            ("Merhaba nasılsın", "tr"),
+        ]:
+            self.assertDetects(text, lang, min_confidence=0.5)
+            self.assertLessEqual(self.detector.detect(text)[1], WORDS_MAX_CONFIDENCE)
+
+    def test_word_guesses_stay_below_default_min_confidence(self):
+        # javanese is not in the word lists, but shares words with indonesian
+        lang, confidence = self.detector.detect("aku ora ngerti")
+        self.assertEqual(lang, "id")
+        self.assertLess(confidence, 0.8)
+
+    def test_unknown_or_ambiguous_text_has_low_confidence(self):
+        self.assertEqual(self.detector.detect("gg"), ("", 0.0))
+        self.assertEqual(self.detector.detect("1234 :)"), ("", 0.0))
+        _lang, confidence = self.detector.detect("que pasa")
+        self.assertLess(confidence, 0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from twitch_tts.pipeline import BLOCKING, INLINE, ORDERED, ChatMessage, MessagePipeline
+
+
+class MessagePipelineTests(unittest.TestCase):
+    def test_runs_stages_in_order_and_stops_on_reject(self):
+        calls = []
+        pipeline = MessagePipeline()
+        pipeline.add_stage("upper", lambda msg: calls.append("upper") or setattr(msg, "text", msg.text.upper()))
+        pipeline.add_stage("reject", lambda msg: calls.append("reject") or msg.text != "SPAM")
+        pipeline.add_stage("react", lambda msg: calls.append("react"), ORDERED)
+
+        msg = ChatMessage("youtube", "bob", "hello")
+        self.assertTrue(pipeline.feed(msg))
+        self.assertFalse(pipeline.feed(ChatMessage("youtube", "bob", "spam")))
+
+        self.assertEqual(msg.text, "HELLO")
+        self.assertEqual(msg.raw, "hello")
+        self.assertEqual(calls, ["upper", "reject", "react", "upper", "reject"])
+
+    def test_counts_calls_rejects_and_errors(self):
+        pipeline = MessagePipeline()
+        pipeline.add_stage("filter", lambda msg: msg.user != "bot")
+        pipeline.add_stage("broken", lambda msg: 1 / 0)
+
+        pipeline.feed(ChatMessage("twitch", "bot", "hi"))
+        pipeline.feed(ChatMessage("twitch", "bob", "hi"))
+
+        stats = pipeline.stats()
+        self.assertEqual(stats["filter"]["calls"], 2)
+        self.assertEqual(stats["filter"]["rejected"], 1)
+        self.assertEqual(stats["broken"]["errors"], 1)
+
+    def test_rejects_stage_kinds_out_of_order(self):
+        pipeline = MessagePipeline()
+        pipeline.add_stage("react", lambda msg: None, ORDERED)
+        with self.assertRaises(ValueError):
+            pipeline.add_stage("clean", lambda msg: None, INLINE)
+
+    def test_feed_async_keeps_arrival_order_for_ordered_stages(self):
+        reacted = []
+        threads = set()
+
+        def slow(msg):
+            threads.add(threading.current_thread().name)
+            # the first message finishes last
+            time.sleep(0.05 if msg.text == "first" else 0.0)
+
+        pipeline = MessagePipeline(workers=4)
+        pipeline.add_stage("translate", slow, BLOCKING)
+        pipeline.add_stage("react", lambda msg: reacted.append(msg.text), ORDERED)
+        pipeline.start()
+
+        async def main():
+            await asyncio.gather(*[
+                pipeline.feed_async(ChatMessage("twitch", "bob", text))
+                for text in ["first", "second", "third"]
+            ])
+
+        try:
+            asyncio.run(main())
+        finally:
+            pipeline.stop()
+
+        self.assertEqual(reacted, ["first", "second", "third"])
+        self.assertTrue(all(name.startswith("pipeline") for name in threads))
+
+    def test_submit_returns_before_blocking_stages_finish(self):
+        reacted = []
+        release = threading.Event()
+
+        pipeline = MessagePipeline(workers=4)
+        pipeline.add_stage("filter", lambda msg: msg.text != "!cmd")
+        pipeline.add_stage("translate", lambda msg: release.wait(1) if msg.text == "first" else None, BLOCKING)
+        pipeline.add_stage("react", lambda msg: reacted.append(msg.text), ORDERED)
+        pipeline.start()
+
+        try:
+            futures = [
+                pipeline.submit(ChatMessage("youtube", "bob", text))
+                for text in ["first", "!cmd", "second", "third"]
+            ]
+            self.assertIsNone(futures[1])
+            self.assertEqual(reacted, [])
+            release.set()
+            self.assertTrue(futures[-1].result(timeout=1))
+        finally:
+            pipeline.stop()
+
+        self.assertEqual(reacted, ["first", "second", "third"])
+
+    def test_drops_messages_after_stop(self):
+        calls = []
+        pipeline = MessagePipeline()
+        pipeline.add_stage("filter", lambda msg: calls.append("filter"))
+        pipeline.add_stage("translate", lambda msg: calls.append("translate"), BLOCKING)
+        pipeline.add_stage("react", lambda msg: calls.append("react"), ORDERED)
+        pipeline.start()
+        pipeline.stop()
+
+        self.assertIsNone(pipeline.submit(ChatMessage("youtube", "bob", "late")))
+        self.assertFalse(asyncio.run(pipeline.feed_async(ChatMessage("twitch", "bob", "late"))))
+        self.assertEqual(calls, [])
+        with self.assertRaises(RuntimeError):
+            pipeline.start()
+
+    def test_submit_needs_start(self):
+        pipeline = MessagePipeline()
+        with self.assertRaises(RuntimeError):
+            pipeline.submit(ChatMessage("youtube", "bob", "early"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+
+from twitch_tts.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpen,
+    Guard,
+    RateLimited,
+    TokenBucket,
+)
+from helpers import FakeClock
+
+
+def fail():
+    raise RuntimeError("429")
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_allows_burst_then_refills_at_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock)
+
+        self.assertEqual([bucket.try_acquire() for _ in range(4)], [True, True, True, False])
+        clock.now += 0.5
+        self.assertEqual([bucket.try_acquire() for _ in range(2)], [True, False])
+
+    def test_acquire_waits_for_refill(self):
+        clock = FakeClock()
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock.now += seconds
+
+        bucket = TokenBucket(rate=5, burst=10, clock=clock, sleep=sleep)
+
+        self.assertTrue(all(bucket.acquire(timeout=5) for _ in range(30)))
+        self.assertAlmostEqual(sum(sleeps), 4.0)
+        self.assertFalse(bucket.acquire(timeout=0.1))
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        self.assertTrue(all(bucket.try_acquire() for _ in range(100)))
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, max_reset_timeout=25, clock=self.clock)
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.trip()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_lets_one_trial_through_after_timeout(self):
+        self.trip()
+        self.clock.now += 10
+
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_backs_off_exponentially_while_failing(self):
+        self.trip()
+        waits = []
+        for _ in range(3):
+            waited = 0
+            while not self.breaker.allow():
+                self.clock.now += 1
+                waited += 1
+            waits.append(waited)
+            self.breaker.record_failure()
+
+        self.assertEqual(waits, [10, 20, 25])
+
+
+class GuardTests(unittest.TestCase):
+    def test_rejects_calls_while_open(self):
+        calls = []
+        guard = Guard(CircuitBreaker(failure_threshold=2, clock=FakeClock()), TokenBucket())
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                guard.call(fail)
+        with self.assertRaises(CircuitOpen):
+            guard.call(calls.append, "x")
+
+        self.assertEqual(calls, [])
+        self.assertEqual(guard.stats(), {"state": OPEN, "trips": 1, "rejected": 1})
+
+    def test_rejects_calls_over_rate(self):
+        guard = Guard(CircuitBreaker(), TokenBucket(rate=1, burst=1, clock=FakeClock()))
+
+        self.assertEqual(guard.call(lambda: "ok"), "ok")
+        with self.assertRaises(RateLimited):
+            guard.call(lambda: "ok")
+
+    def test_waits_for_budget_up_to_wait(self):
+        clock = FakeClock(start=100.0)
+
+        def sleep(seconds):
+            clock.now += seconds
+
+        guard = Guard(CircuitBreaker(), TokenBucket(rate=1, burst=1, clock=clock, sleep=sleep), wait=2)
+
+        self.assertEqual([guard.call(lambda: "ok") for _ in range(3)], ["ok"] * 3)
+        self.assertEqual(clock.now, 102.0)
+
+    def test_open_breaker_does_not_spend_budget(self):
+        bucket = TokenBucket(rate=1, burst=1, clock=FakeClock())
+        guard = Guard(CircuitBreaker(failure_threshold=1, clock=FakeClock()), bucket)
+        with self.assertRaises(RuntimeError):
+            guard.call(fail)
+
+        with self.assertRaises(CircuitOpen):
+            guard.call(lambda: "ok")
+        self.assertFalse(bucket.try_acquire())  # only the failed call spent a token
+
+    def test_rate_limited_trial_is_tried_again(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        guard = Guard(breaker, TokenBucket(rate=0.01, burst=1, clock=clock))
+        with self.assertRaises(RuntimeError):
+            guard.call(fail)
+        clock.now += 10
+
+        with self.assertRaises(RateLimited):
+            guard.call(lambda: "ok")
+        self.assertTrue(breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+import threading
+import time
+import unittest
+
+from twitch_tts.tts_pipeline import DROP_NEWEST, FairQueue, TtsPipeline, TtsQueue, Utterance
+from helpers import FakeClock
+
+
+class Recorder:
+    def __init__(self, expected):
+        self.played = []
+        self.events = []
+        self.expected = expected
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+
+    def log(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    def play(self, audio):
+        self.current = audio
+        self.log(("play-start", audio))
+
+    def wait(self):
+        time.sleep(0.05)
+        self.log(("play-end", self.current))
+        self.played.append(self.current)
+        if len(self.played) == self.expected:
+            self.done.set()
+
+    def stop(self):
+        self.log(("stop",))
+
+    def pipeline(self, synth, **kwargs):
+        return TtsPipeline(synth, self.play, self.wait, self.stop, **kwargs)
+
+
+class TtsPipelineTests(unittest.TestCase):
+    def test_plays_in_queue_order_even_if_synthesis_finishes_out_of_order(self):
+        recorder = Recorder(expected=3)
+        delays = {"a": 0.1, "b": 0.0, "c": 0.05}
+
+        def synth(text, lang):
+            time.sleep(delays[text])
+            return f"{text}.{lang}"
+
+        pipeline = recorder.pipeline(synth, workers=3, prefetch=3)
+        pipeline.start()
+        for text in "abc":
+            pipeline.put(text, "en")
+
+        self.assertTrue(recorder.done.wait(2))
+        pipeline.stop()
+        self.assertEqual(recorder.played, ["a.en", "b.en", "c.en"])
+
+    def test_synthesizes_next_utterance_while_playing(self):
+        recorder = Recorder(expected=2)
+
+        def synth(text, lang):
+            recorder.log(("synth", text))
+            return text
+
+        pipeline = recorder.pipeline(synth, workers=1, prefetch=1)
+        pipeline.start()
+        pipeline.put("a", "en")
+        pipeline.put("b", "en")
+
+        self.assertTrue(recorder.done.wait(2))
+        pipeline.stop()
+        self.assertLess(
+            recorder.events.index(("synth", "b")),
+            recorder.events.index(("play-end", "a")),
+        )
+
+    def test_skips_utterances_without_audio(self):
+        recorder = Recorder(expected=1)
+        pipeline = recorder.pipeline(lambda text, lang: None if text == "skip" else text)
+        pipeline.start()
+        pipeline.put("skip", "en")
+        pipeline.put("play", "en")
+
+        self.assertTrue(recorder.done.wait(2))
+        pipeline.stop()
+        self.assertEqual(recorder.played, ["play"])
+
+    def test_flush_drops_queued_and_in_flight_utterances(self):
+        recorder = Recorder(expected=2)
+        release = threading.Event()
+
+        def synth(text, lang):
+            if text == "slow":
+                release.wait(2)
+            return text
+
+        pipeline = recorder.pipeline(synth, workers=2, prefetch=2)
+        pipeline.start()
+        pipeline.put("slow", "en")
+        for text in "abc":
+            pipeline.put(text, "en")
+        time.sleep(0.05)
+
+        pipeline.flush()
+        release.set()
+        pipeline.put("after", "en")
+        pipeline.put("again", "en")
+
+        self.assertTrue(recorder.done.wait(2))
+        pipeline.stop()
+        self.assertEqual(recorder.played, ["after", "again"])
+        self.assertIn(("stop",), recorder.events)
+        self.assertEqual(pipeline.stats()["depth"], 0)
+
+    def test_flush_of_channel_keeps_other_channels(self):
+        recorder = Recorder(expected=2)
+        release = threading.Event()
+
+        def synth(text, lang):
+            if text == "slow":
+                release.wait(2)
+            return text
+
+        tts_queue = FairQueue()
+        tts_queue.configure("a")
+        tts_queue.configure("b")
+        pipeline = recorder.pipeline(synth, workers=2, prefetch=2, tts_queue=tts_queue)
+        pipeline.start()
+        pipeline.put("slow", "en", channel="a")
+        pipeline.put("a1", "en", channel="a")
+        pipeline.put("b1", "en", channel="b")
+        pipeline.put("a2", "en", channel="a")
+        time.sleep(0.05)
+
+        pipeline.flush("a")
+        release.set()
+        pipeline.put("a3", "en", channel="a")
+
+        self.assertTrue(recorder.done.wait(2))
+        # nothing of channel a was playing, so playback was not stopped
+        self.assertNotIn(("stop",), recorder.events)
+        pipeline.stop()
+        self.assertEqual(recorder.played, ["b1", "a3"])
+
+    def test_utterance_taken_during_flush_is_dropped(self):
+        recorder = Recorder(expected=1)
+        pipeline = None
+
+        class RacingQueue(TtsQueue):
+            def _pop(self):
+                item = super()._pop()
+                if item is not None and item.text == "old":
+                    # flush while the dispatcher is taking the utterance
+                    flusher = threading.Thread(target=pipeline.flush)
+                    flusher.start()
+                    flusher.join(0.1)
+                return item
+
+        pipeline = recorder.pipeline(lambda text, lang: text, tts_queue=RacingQueue())
+        pipeline.start()
+        pipeline.put("old", "en")
+        time.sleep(0.2)
+        pipeline.put("new", "en")
+
+        self.assertTrue(recorder.done.wait(2))
+        pipeline.stop()
+        self.assertEqual(recorder.played, ["new"])
+
+
+def texts(tts_queue):
+    return [item.text for item in tts_queue._items]
+
+
+class TtsQueueTests(unittest.TestCase):
+    def test_drop_oldest_when_full(self):
+        tts_queue = TtsQueue(maxsize=2)
+        for text in "abc":
+            tts_queue.put(Utterance(text, "en"))
+
+        self.assertEqual(texts(tts_queue), ["b", "c"])
+        self.assertEqual(tts_queue.stats()["dropped"], {"full": 1})
+
+    def test_drop_newest_when_full(self):
+        tts_queue = TtsQueue(maxsize=2, policy=DROP_NEWEST)
+        for text in "abc":
+            tts_queue.put(Utterance(text, "en"))
+
+        self.assertEqual(texts(tts_queue), ["a", "b"])
+
+    def test_limits_utterances_per_user(self):
+        tts_queue = TtsQueue(per_user=1)
+        tts_queue.put(Utterance("a1", "en", "alice"))
+        tts_queue.put(Utterance("b1", "en", "bob"))
+        tts_queue.put(Utterance("a2", "en", "alice"))
+
+        self.assertEqual(texts(tts_queue), ["b1", "a2"])
+        self.assertEqual(tts_queue.stats()["dropped"], {"per_user": 1})
+
+    def test_drops_utterances_older_than_max_age(self):
+        clock = FakeClock()
+        tts_queue = TtsQueue(max_age=10, clock=clock)
+        tts_queue.put(Utterance("old", "en", queued_at=0))
+        tts_queue.put(Utterance("new", "en", queued_at=5))
+
+        clock.now = 12
+        self.assertEqual(tts_queue.get().text, "new")
+        self.assertEqual(tts_queue.stats()["dropped"], {"too_old": 1})
+
+    def test_merges_consecutive_lines_of_same_user(self):
+        tts_queue = TtsQueue(merge=True)
+        tts_queue.put(Utterance("hello", "en", "alice"))
+        tts_queue.put(Utterance("there", "en", "alice"))
+        tts_queue.put(Utterance("hallo", "de", "alice"))
+        tts_queue.put(Utterance("hi", "en", "bob"))
+
+        self.assertEqual(texts(tts_queue), ["hello there", "hallo", "hi"])
+        self.assertEqual(tts_queue.stats()["merged"], 1)
+
+    def test_get_returns_none_after_close(self):
+        tts_queue = TtsQueue()
+        threading.Timer(0.05, tts_queue.close).start()
+        self.assertIsNone(tts_queue.get())
+
+
+class FairQueueTests(unittest.TestCase):
+    def test_serves_channels_in_turn(self):
+        tts_queue = FairQueue()
+        tts_queue.configure("busy")
+        tts_queue.configure("quiet")
+        for text in ["b1", "b2", "b3"]:
+            tts_queue.put(Utterance(text, "en", channel="busy"))
+        tts_queue.put(Utterance("q1", "en", channel="quiet"))
+
+        self.assertEqual([tts_queue.get().text for _ in range(4)], ["b1", "q1", "b2", "b3"])
+
+    def test_keeps_limits_per_channel(self):
+        tts_queue = FairQueue()
+        tts_queue.configure("a", maxsize=1)
+        tts_queue.configure("b", maxsize=2)
+        for channel in "ab":
+            for text in "xyz":
+                tts_queue.put(Utterance(text, "en", channel=channel))
+        tts_queue.put(Utterance("lost", "en", channel="unknown"))
+
+        stats = tts_queue.stats()
+        self.assertEqual(stats["depth"], 3)
+        self.assertEqual(stats["channels"]["a"]["dropped"], {"full": 2})
+        self.assertEqual(stats["channels"]["b"]["dropped"], {"full": 1})
+
+    def test_backlog_of_all_channels(self):
+        clock = FakeClock()
+        tts_queue = FairQueue(clock=clock)
+        tts_queue.configure("a")
+        tts_queue.configure("b")
+        tts_queue.put(Utterance("a1", "en", channel="a", queued_at=2))
+        tts_queue.put(Utterance("b1", "en", channel="b", queued_at=5))
+        tts_queue.put(Utterance("b2", "en", channel="b", queued_at=6))
+
+        clock.now = 10
+        self.assertEqual(tts_queue.backlog(), (3, 8))
+
+    def test_get_waits_for_any_channel(self):
+        tts_queue = FairQueue()
+        tts_queue.configure("a")
+        tts_queue.configure("b")
+        threading.Timer(0.05, tts_queue.put, [Utterance("hi", "en", channel="b")]).start()
+
+        self.assertEqual(tts_queue.get().text, "hi")
+        tts_queue.close()
+        self.assertIsNone(tts_queue.get())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,241 @@
+import os
+import tempfile
+import unittest
+
+from twitch_tts import yt
+from helpers import FakeClock
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeResource:
+    def __init__(self, youtube, name):
+        self.youtube = youtube
+        self.name = name
+
+    def list(self, **kwargs):
+        self.youtube.calls.append((self.name, kwargs))
+        return FakeRequest(self.youtube.responses.get(self.name, {"items": []}))
+
+
+class FakeYoutube:
+    def __init__(self, **responses):
+        self.responses = responses
+        self.calls = []
+
+    def channels(self):
+        return FakeResource(self, "channels")
+
+    def search(self):
+        return FakeResource(self, "search")
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"{self.status_code}")
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.cookies = self
+
+    def set(self, *args, **kwargs):
+        pass
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append((url, headers))
+        return self.responses.pop(0)
+
+
+CHANNEL_ID = "UC" + "a" * 22
+LIVE_PAGE = (
+    '<link rel="canonical" href="https://www.youtube.com/watch?v=abcdefghijk">'
+    '<script>var ytInitialPlayerResponse = {"isLiveNow":true};</script>'
+)
+UPCOMING_PAGE = (
+    '<link rel="canonical" href="https://www.youtube.com/watch?v=abcdefghijk">'
+    '<script>var ytInitialPlayerResponse = {"isUpcoming":true};</script>'
+)
+OFFLINE_PAGE = '<script>var ytInitialData = {};</script>'
+
+
+class QuotaMeterTests(unittest.TestCase):
+    def test_reports_units_of_last_hour(self):
+        clock = FakeClock()
+        quota = yt.QuotaMeter(clock=clock)
+        quota.spend(100)
+        clock.now += 1800
+        quota.spend(1)
+        self.assertEqual(quota.per_hour(), 101)
+
+        clock.now += 1801
+        self.assertEqual(quota.per_hour(), 1)
+        self.assertEqual(quota.total, 101)
+
+
+class ResolveChannelIdTests(unittest.TestCase):
+    def test_channel_ids_need_no_request(self):
+        youtube = FakeYoutube()
+        self.assertEqual(yt.resolve_channel_id(youtube, CHANNEL_ID), CHANNEL_ID)
+        self.assertEqual(yt.resolve_channel_id(youtube, f"https://www.youtube.com/channel/{CHANNEL_ID}"), CHANNEL_ID)
+        self.assertEqual(youtube.calls, [])
+
+    def test_handles_are_listed_instead_of_searched(self):
+        youtube = FakeYoutube(channels={"items": [{"id": CHANNEL_ID}]})
+        quota = yt.QuotaMeter()
+
+        channel_id = yt.resolve_channel_id(youtube, "https://www.youtube.com/@achan_jp", quota=quota)
+
+        self.assertEqual(channel_id, CHANNEL_ID)
+        self.assertEqual(youtube.calls, [("channels", {"part": "id", "forHandle": "@achan_jp"})])
+        self.assertEqual(quota.total, yt.LIST_COST)
+
+    def test_resolved_ids_are_cached_in_file(self):
+        youtube = FakeYoutube(channels={"items": [{"id": CHANNEL_ID}]})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "channels.json")
+            yt.resolve_channel_id(youtube, "@achan_jp", cache=yt.ChannelIdCache(path))
+
+            channel_id = yt.resolve_channel_id(youtube, "@achan_jp", cache=yt.ChannelIdCache(path))
+
+        self.assertEqual(channel_id, CHANNEL_ID)
+        self.assertEqual(len(youtube.calls), 1)
+
+
+class LiveCheckerTests(unittest.TestCase):
+    def checker(self, *responses, youtube=None):
+        return yt.LiveChecker(
+            youtube or FakeYoutube(),
+            quota=yt.QuotaMeter(),
+            min_interval=10,
+            max_interval=40,
+            session=FakeSession(*responses),
+            clock=FakeClock(),
+        )
+
+    def test_finds_live_video_on_live_page(self):
+        checker = self.checker(FakeResponse(text=LIVE_PAGE))
+        self.assertEqual(checker.check(CHANNEL_ID), "abcdefghijk")
+        self.assertEqual(checker.quota.total, 0)
+
+    def test_upcoming_stream_is_not_live(self):
+        checker = self.checker(FakeResponse(text=UPCOMING_PAGE))
+        self.assertIsNone(checker.check(CHANNEL_ID))
+
+    def test_uses_conditional_get(self):
+        checker = self.checker(
+            FakeResponse(text=LIVE_PAGE, headers={"ETag": '"v1"'}),
+            FakeResponse(status_code=304),
+        )
+        checker.check(CHANNEL_ID)
+
+        self.assertEqual(checker.check(CHANNEL_ID), "abcdefghijk")
+        self.assertEqual(checker.session.requests[1][1], {"If-None-Match": '"v1"'})
+
+    def test_backs_off_while_offline(self):
+        checker = self.checker(*[FakeResponse(text=OFFLINE_PAGE)] * 5, FakeResponse(text=LIVE_PAGE))
+        intervals = []
+        for _ in range(6):
+            checker.check(CHANNEL_ID)
+            intervals.append(checker.interval)
+
+        self.assertEqual(intervals, [15, 22.5, 33.75, 40, 40, 10])
+
+    def test_falls_back_to_rare_searches(self):
+        youtube = FakeYoutube(search={"items": [{"id": {"videoId": "abcdefghijk"}, "snippet": {"title": "live"}}]})
+        checker = self.checker(FakeResponse(status_code=500), FakeResponse(text="consent"), youtube=youtube)
+
+        self.assertEqual(checker.check(CHANNEL_ID), "abcdefghijk")
+        self.assertIsNone(checker.check(CHANNEL_ID))
+        self.assertEqual(checker.quota.total, yt.SEARCH_COST)
+
+
+class FakeChatData:
+    def __init__(self, items, interval):
+        self.items = items
+        self.interval = interval
+
+
+class FakeChat:
+    """Returns the given chat data, an exception ends the chat with it."""
+
+    def __init__(self, *data):
+        self.data = list(data)
+        self.error = None
+
+    def is_alive(self):
+        return self.error is None and bool(self.data)
+
+    def get(self):
+        data = self.data.pop(0)
+        if isinstance(data, Exception):
+            self.error = data
+            return FakeChatData([], 0)
+        return data
+
+    def raise_for_status(self):
+        if self.error:
+            raise self.error
+
+
+class ChatReaderTests(unittest.TestCase):
+    def reader(self, *chats):
+        chats = list(chats)
+        received = []
+        reader = yt.ChatReader(lambda video_id: chats.pop(0), received.append, min_interval=1, max_interval=5)
+        reader.waits = []
+        reader.wait = lambda seconds: reader.waits.append(seconds) or True
+        return reader, received
+
+    def test_waits_poll_interval_of_server(self):
+        reader, received = self.reader(FakeChat(
+            FakeChatData(["a", "b"], 3),
+            FakeChatData([], 0.1),
+            FakeChatData(["c"], 20),
+            yt.ChatDataFinished(),
+        ))
+
+        reader.run("abcdefghijk")
+
+        self.assertEqual(received, ["a", "b", "c"])
+        self.assertEqual(reader.waits, [3, 1, 5])
+        self.assertEqual(reader.reconnects, 0)
+
+    def test_reconnects_with_backoff(self):
+        reader, received = self.reader(
+            FakeChat(FakeChatData(["a"], 1), RuntimeError("connection reset")),
+            FakeChat(RuntimeError("connection reset")),
+            FakeChat(FakeChatData(["b"], 1), yt.ChatDataFinished()),
+        )
+
+        reader.run("abcdefghijk")
+
+        self.assertEqual(received, ["a", "b"])
+        self.assertEqual(reader.waits, [1, 1, 2, 1])
+        self.assertEqual(reader.reconnects, 2)
+
+    def test_gives_up_after_max_reconnects(self):
+        reader, received = self.reader(*[FakeChat(RuntimeError("403")) for _ in range(6)])
+        reader.max_reconnects = 3
+
+        reader.run("abcdefghijk")
+
+        self.assertEqual(reader.waits, [1, 2, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()